@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from natsort import natsorted
+
+import conversor
+
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.webp', '.avif')
+
+def listar_capitulos(pasta_obra):
+    """Retorna (lista_imagens, pasta) de cada subpasta de capítulo da obra."""
+    capitulos = []
+    for nome in natsorted(os.listdir(pasta_obra)):
+        pasta = os.path.join(pasta_obra, nome)
+        if not os.path.isdir(pasta):
+            continue
+        imagens = natsorted([f for f in os.listdir(pasta) if f.lower().endswith(EXTENSOES_IMAGEM)])
+        if imagens:
+            capitulos.append((imagens, pasta))
+    return capitulos
+
+def criar_cbz_em_lote(capitulos, max_workers=None):
+    """
+    Cria os CBZ de vários capítulos ao mesmo tempo, em threads. `capitulos` é uma
+    lista de (lista_imagens, pasta_base_imagens, caminho_cbz_saida). Só serve para
+    comparar com o pipeline, que já converte cada capítulo no pool de processos.
+    """
+    if not capitulos:
+        return []
+    max_workers = max_workers or min(len(capitulos), (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda args: conversor.criar_cbz_de_imagens(*args), capitulos))
+
+def medir(funcao, pasta_saida):
+    """Roda `funcao` e retorna (tempo de CPU, tempo real, tamanho total dos CBZ gerados)."""
+    os.makedirs(pasta_saida)
+    # Silencia as mensagens de cada CBZ criado
+    stdout_original = sys.stdout
+    sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+    try:
+        cpu_inicio, real_inicio = time.process_time(), time.perf_counter()
+        funcao(pasta_saida)
+        cpu, real = time.process_time() - cpu_inicio, time.perf_counter() - real_inicio
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout_original
+    tamanho = sum(os.path.getsize(os.path.join(pasta_saida, f)) for f in os.listdir(pasta_saida))
+    return cpu, real, tamanho
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python benchmark_cbz.py <pasta da obra com as pastas dos capítulos>")
+        return
+    pasta_obra = sys.argv[1]
+    capitulos = listar_capitulos(pasta_obra)
+    if not capitulos:
+        print(f"[x] Nenhuma pasta de capítulo com imagens encontrada em: {pasta_obra}")
+        return
+    total_imagens = sum(len(imagens) for imagens, _ in capitulos)
+    print(f"[✔] {len(capitulos)} capítulos, {total_imagens} imagens.\n")
+
+    def destinos(pasta_saida):
+        return [(imagens, pasta, os.path.join(pasta_saida, f"{i:04d}.cbz")) for i, (imagens, pasta) in enumerate(capitulos)]
+
+    def tudo_deflate(pasta_saida):
+        # Comportamento antigo: todas as entradas com ZIP_DEFLATED
+        for imagens, pasta, caminho in destinos(pasta_saida):
+            with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for nome_arquivo in imagens:
+                    zf.write(os.path.join(pasta, nome_arquivo), arcname=nome_arquivo)
+
+    def por_entrada(pasta_saida):
+        for args in destinos(pasta_saida):
+            conversor.criar_cbz_de_imagens(*args)
+
+    def em_lote(pasta_saida):
+        criar_cbz_em_lote(destinos(pasta_saida))
+
+    pasta_temp = tempfile.mkdtemp(prefix="benchmark_cbz_")
+    try:
+        for i, (descricao, funcao) in enumerate([
+            ("Deflate em tudo (antigo)", tudo_deflate),
+            ("Compressão por entrada", por_entrada),
+            ("Por entrada + lote em paralelo", em_lote),
+        ]):
+            cpu, real, tamanho = medir(funcao, os.path.join(pasta_temp, str(i)))
+            print(f"  {descricao:<32} CPU: {cpu:7.2f}s | real: {real:7.2f}s | tamanho: {tamanho / 1024 / 1024:9.2f} MB")
+    finally:
+        shutil.rmtree(pasta_temp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
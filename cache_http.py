@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+from config import PASTA_CACHE, CACHE_HTTP_TTL, CACHE_HTTP_TAMANHO_MAX_MB
+
+# ==============================================================================
+# CACHE HTTP DAS APIS (JSON)
+# Guarda no disco as respostas das APIs (dados da obra, páginas do capítulo) com
+# o ETag/Last-Modified do servidor. Dentro do TTL a resposta vem direto do disco;
+# depois disso a requisição vai com If-None-Match/If-Modified-Since e um 304 evita
+# baixar o corpo de novo. Sem validadores, a entrada vencida é baixada inteira e
+# o hash do corpo diz se ele mudou: quem chama pode pular o processamento de uma
+# resposta igual à anterior. Só respostas 2xx que a API deu como bem-sucedidas
+# são guardadas.
+# ==============================================================================
+
+PASTA_CACHE_HTTP = os.path.join(PASTA_CACHE, 'http')
+
+_trava_limpeza = threading.Lock()
+
+def _caminho_da_entrada(url):
+    return os.path.join(PASTA_CACHE_HTTP, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+def _ler_entrada(url):
+    try:
+        with open(_caminho_da_entrada(url), 'r', encoding='utf-8') as f:
+            entrada = json.load(f)
+        return entrada if entrada.get('url') == url else None
+    except (OSError, ValueError):
+        return None
+
+def _gravar_entrada(entrada):
+    """
+    Grava a entrada de forma atômica e mantém a pasta dentro do tamanho máximo.
+    Uma falha de disco só é avisada: a resposta já obtida continua valendo.
+    """
+    temporario = None
+    try:
+        os.makedirs(PASTA_CACHE_HTTP, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=PASTA_CACHE_HTTP, suffix='.part')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporario, _caminho_da_entrada(entrada['url']))
+        _limitar_tamanho()
+    except OSError as e:
+        print(f"  [!] Não foi possível gravar o cache HTTP: {e}")
+        if temporario is not None and os.path.exists(temporario):
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+
+def _limitar_tamanho():
+    """Remove as entradas usadas há mais tempo até a pasta caber no limite."""
+    limite = CACHE_HTTP_TAMANHO_MAX_MB * 1024 * 1024
+    with _trava_limpeza:
+        arquivos = []
+        for nome in os.listdir(PASTA_CACHE_HTTP):
+            caminho = os.path.join(PASTA_CACHE_HTTP, nome)
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, caminho))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= limite:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+
+def _hash_do_corpo(corpo):
+    return hashlib.sha256(corpo.encode('utf-8')).hexdigest()
+
+def buscar(sessao, url, timeout=20, ttl=None, aceitar=None):
+    """
+    Faz um GET passando pelo cache. Retorna a entrada do cache, um dict com o
+    'corpo' (texto), a 'origem' ('cache', 'validado' ou 'rede') e 'inalterado',
+    que diz se o corpo é o mesmo guardado da última vez. `aceitar(corpo)`
+    decide se uma resposta 2xx pode ser guardada (ex: a API respondeu com erro).
+    Levanta a exceção da requisição se não houver cópia no cache para usar no lugar.
+    """
+    ttl = CACHE_HTTP_TTL if ttl is None else ttl
+    entrada = _ler_entrada(url)
+    agora = time.time()
+
+    if entrada is not None and agora - entrada['validado_em'] < ttl:
+        # Dentro do TTL: nem pergunta ao servidor. Toca no arquivo para a limpeza por uso.
+        try:
+            os.utime(_caminho_da_entrada(url))
+        except OSError:
+            pass
+        return dict(entrada, origem='cache', inalterado=True)
+
+    headers = {}
+    if entrada is not None:
+        if entrada.get('etag'):
+            headers['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            headers['If-Modified-Since'] = entrada['last_modified']
+
+    try:
+        response = sessao.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entrada is not None:
+            entrada['validado_em'] = agora
+            _gravar_entrada(entrada)
+            return dict(entrada, origem='validado', inalterado=True)
+        response.raise_for_status()
+    except Exception as e:
+        if entrada is None:
+            raise
+        print(f"  [!] Falha ao consultar a API ({e}). Usando a cópia do cache.")
+        return dict(entrada, origem='cache', inalterado=True)
+
+    nova = {
+        'url': url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'validado_em': agora,
+        'corpo': response.text,
+        'sha256': _hash_do_corpo(response.text),
+    }
+    if aceitar is not None and not aceitar(nova['corpo']):
+        return dict(nova, origem='rede', inalterado=False)
+    # Servidor sem validadores (ou que os ignora): o hash mostra se o corpo é o mesmo
+    inalterado = entrada is not None and entrada.get('sha256') == nova['sha256']
+    _gravar_entrada(nova)
+    return dict(nova, origem='rede', inalterado=inalterado)
+
+def _resposta_bem_sucedida(corpo):
+    """Respostas que não são JSON ou que a API marca com 'success': false não vão para o cache."""
+    try:
+        dados = json.loads(corpo)
+    except ValueError:
+        return False
+    return not (isinstance(dados, dict) and dados.get('success') is False)
+
+def obter_json_com_estado(sessao, url, timeout=20, ttl=None):
+    """
+    Como obter_json, mas retorna (dados, inalterado): `inalterado` é True quando a
+    resposta é a mesma da última vez (cache, 304 ou corpo com o mesmo hash).
+    """
+    resposta = buscar(sessao, url, timeout=timeout, ttl=ttl, aceitar=_resposta_bem_sucedida)
+    return json.loads(resposta['corpo']), resposta['inalterado']
+
+def obter_json(sessao, url, timeout=20, ttl=None):
+    """Atalho para as APIs: retorna o JSON da URL, usando o cache quando possível."""
+    return obter_json_com_estado(sessao, url, timeout=timeout, ttl=ttl)[0]
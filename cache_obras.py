@@ -0,0 +1,58 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+from config import PASTA_CACHE, CACHE_OBRAS_TTL
+
+# ==============================================================================
+# CACHE DOS DADOS DAS OBRAS
+# Nos sites com navegador, só descobrir o título e a lista de capítulos já exige
+# abrir o Chrome e carregar a página da obra. Guardamos esses dados por URL da
+# obra para que a escolha dos capítulos seja imediata; o navegador só é iniciado
+# quando um capítulo realmente precisa dele ou quando o cache está velho.
+# ==============================================================================
+
+PASTA_CACHE_OBRAS = os.path.join(PASTA_CACHE, 'obras')
+
+def _caminho_da_obra(obra_url):
+    return os.path.join(PASTA_CACHE_OBRAS, hashlib.sha256(obra_url.encode('utf-8')).hexdigest() + '.json')
+
+def ler_obra(obra_url, ttl=None):
+    """
+    Retorna (titulo, lista_de_capitulos, idade_em_segundos) do cache, ou None se a
+    obra não está no cache ou se os dados são mais velhos que o TTL.
+    """
+    ttl = CACHE_OBRAS_TTL if ttl is None else ttl
+    if ttl <= 0:
+        return None
+    try:
+        with open(_caminho_da_obra(obra_url), 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if dados.get('url') != obra_url:
+        return None
+    idade = time.time() - dados['obtido_em']
+    if idade > ttl or not dados['capitulos']:
+        return None
+    return dados['titulo'], dados['capitulos'], idade
+
+def salvar_obra(obra_url, titulo, lista_de_capitulos):
+    """Guarda o título e a lista de capítulos obtidos no site."""
+    if not titulo or not lista_de_capitulos:
+        return
+    try:
+        os.makedirs(PASTA_CACHE_OBRAS, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=PASTA_CACHE_OBRAS, suffix='.part')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': obra_url,
+                'titulo': titulo,
+                'capitulos': lista_de_capitulos,
+                'obtido_em': time.time(),
+            }, f, ensure_ascii=False)
+        os.replace(temporario, _caminho_da_obra(obra_url))
+    except OSError as e:
+        print(f"  [!] Não foi possível salvar os dados da obra no cache: {e}")
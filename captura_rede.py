@@ -0,0 +1,109 @@
+import json
+import base64
+import weakref
+
+from config import CAPTURAR_IMAGENS_DA_REDE
+
+# ==============================================================================
+# CAPTURA DE IMAGENS PELA REDE DO NAVEGADOR (CDP)
+# O navegador já baixou as imagens do capítulo para exibi-las. Em vez de baixar
+# tudo de novo, pegamos o corpo das respostas direto do domínio Network do
+# Chrome, usando os eventos do log de performance ('goog:loggingPrefs').
+# ==============================================================================
+
+# Buffer que o Chrome reserva para guardar os corpos das respostas
+TAMANHO_BUFFER_REDE = 256 * 1024 * 1024
+TAMANHO_MAXIMO_RECURSO = 32 * 1024 * 1024
+
+# Eventos de rede acumulados por driver desde a última limpeza. O log de
+# performance só pode ser lido uma vez, então todos os leitores usam este buffer.
+_eventos = weakref.WeakKeyDictionary()
+
+def habilitar_buffer_de_rede(driver):
+    """Aumenta o buffer do domínio Network para que os corpos das imagens não sejam descartados."""
+    driver.execute_cdp_cmd('Network.enable', {
+        'maxTotalBufferSize': TAMANHO_BUFFER_REDE,
+        'maxResourceBufferSize': TAMANHO_MAXIMO_RECURSO,
+    })
+
+def limpar_log_rede(driver):
+    """Descarta os eventos de rede acumulados até agora (ex: antes de abrir um capítulo)."""
+    driver.get_log('performance')
+    _eventos[driver] = []
+
+def eventos_de_rede(driver):
+    """Lê os eventos novos do log de performance e retorna todos desde a última limpeza."""
+    eventos = _eventos.setdefault(driver, [])
+    for entry in driver.get_log('performance'):
+        try:
+            eventos.append(json.loads(entry['message'])['message'])
+        except (KeyError, ValueError):
+            continue
+    return eventos
+
+def preparar_captura(driver):
+    """
+    Chamado antes de navegar para o capítulo: descarta os eventos das páginas
+    anteriores, usados tanto pela captura quanto pela espera de rede ociosa (prontidao.py).
+    """
+    limpar_log_rede(driver)
+
+def _respostas_de_imagem(driver):
+    """Mapeia URL -> requestId das respostas de imagem que terminaram de carregar."""
+    url_original = {}
+    respostas = {}
+    finalizadas = set()
+    for evento in eventos_de_rede(driver):
+        metodo = evento.get('method')
+        params = evento.get('params', {})
+        request_id = params.get('requestId')
+        if metodo == 'Network.requestWillBeSent':
+            # Guarda a URL pedida antes de redirecionamentos, que é a que aparece no <img>
+            url_original.setdefault(request_id, params['request']['url'])
+        elif metodo == 'Network.responseReceived':
+            response = params.get('response', {})
+            if response.get('status') == 200 and response.get('mimeType', '').startswith('image/'):
+                respostas[response['url']] = request_id
+                if request_id in url_original:
+                    respostas.setdefault(url_original[request_id], request_id)
+        elif metodo == 'Network.loadingFinished':
+            finalizadas.add(request_id)
+    return {url: rid for url, rid in respostas.items() if rid in finalizadas}
+
+def salvar_imagens_capturadas(driver, jobs):
+    """
+    Salva direto na pasta do capítulo as imagens que o navegador já carregou.
+    Recebe os jobs (url, headers, cookies, destino) e retorna (capturadas, jobs_restantes);
+    os restantes ainda precisam ser baixados pelo motor de download.
+    """
+    if not CAPTURAR_IMAGENS_DA_REDE or not jobs:
+        return 0, jobs
+
+    try:
+        respostas = _respostas_de_imagem(driver)
+    except Exception as e:
+        print(f"    -> Não foi possível ler o log de rede do navegador: {e}")
+        return 0, jobs
+
+    capturadas = 0
+    restantes = []
+    for job in jobs:
+        url, _, _, destino = job
+        request_id = respostas.get(url)
+        if request_id is None:
+            restantes.append(job)
+            continue
+        try:
+            corpo = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            dados = corpo['body']
+            dados = base64.b64decode(dados) if corpo.get('base64Encoded') else dados.encode('latin-1')
+            with open(destino, 'wb') as f:
+                f.write(dados)
+            capturadas += 1
+        except Exception:
+            # O corpo pode ter sido descartado do buffer; baixa normalmente
+            restantes.append(job)
+
+    if capturadas:
+        print(f"    -> {capturadas} imagens capturadas da rede do navegador; {len(restantes)} serão baixadas.")
+    return capturadas, restantes
@@ -0,0 +1,106 @@
+import os
+
+# ==============================================================================
+# CONFIGURAÇÕES GERAIS
+# Todos os valores podem ser sobrescritos por variáveis de ambiente.
+# ==============================================================================
+
+def _ler_int(nome, padrao):
+    """Lê um inteiro de uma variável de ambiente, usando o padrão se inválido."""
+    try:
+        return int(os.environ.get(nome, padrao))
+    except ValueError:
+        return padrao
+
+# Quantas páginas de um capítulo podem ser baixadas ao mesmo tempo
+MAX_DOWNLOADS_SIMULTANEOS = _ler_int('MANGA_MAX_DOWNLOADS', 8)
+
+# Limite de conexões simultâneas para um mesmo host (CDN)
+MAX_CONEXOES_POR_HOST = _ler_int('MANGA_MAX_CONEXOES_HOST', 4)
+
+# Usa HTTP/2 nos downloads quando o httpx e o pacote h2 estiverem instalados
+USAR_HTTP2 = _ler_int('MANGA_HTTP2', 1) == 1
+
+# Salva as imagens que o navegador já carregou (via CDP) em vez de baixá-las de novo
+CAPTURAR_IMAGENS_DA_REDE = _ler_int('MANGA_CAPTURA_REDE', 0) == 1
+
+# Modo de colheita: nas páginas de capítulo o navegador só precisa expor as URLs
+# das imagens, então imagens, fontes, mídia e rastreadores são bloqueados
+MODO_COLHEITA = _ler_int('MANGA_MODO_COLHEITA', 1) == 1
+
+# Padrões extras (separados por vírgula) somados à lista de bloqueio padrão
+BLOQUEIO_COLHEITA_EXTRA = [p.strip() for p in os.environ.get('MANGA_BLOQUEIO_EXTRA', '').split(',') if p.strip()]
+
+# Quantos capítulos podem ficar esperando entre uma etapa e outra do pipeline
+# (navegador -> download -> conversão). Limita a memória e o trabalho adiantado.
+PROFUNDIDADE_PIPELINE = _ler_int('MANGA_PROFUNDIDADE_PIPELINE', 2)
+
+# Processos usados para converter capítulos em PDF/CBZ (padrão: um por núcleo)
+PROCESSOS_CONVERSAO = _ler_int('MANGA_PROCESSOS_CONVERSAO', os.cpu_count() or 2)
+
+# Como o PDF iguala a largura das páginas:
+#  'escala'  -> ajusta o tamanho da página no PDF, sem reamostrar os pixels (rápido)
+#  'lanczos' -> redimensiona os pixels com LANCZOS (mais lento, modo de qualidade)
+MODO_LAYOUT_PDF = os.environ.get('MANGA_LAYOUT_PDF', 'escala').strip().lower()
+
+# Pasta dos caches locais (respostas das APIs, dados das obras...)
+PASTA_CACHE = os.environ.get('MANGA_PASTA_CACHE', '.cache_manga')
+
+# Cache HTTP das APIs em JSON: por quantos segundos uma resposta é usada sem
+# perguntar ao servidor, e o tamanho máximo da pasta do cache (em MB)
+CACHE_HTTP_TTL = _ler_int('MANGA_CACHE_HTTP_TTL', 600)
+CACHE_HTTP_TAMANHO_MAX_MB = _ler_int('MANGA_CACHE_HTTP_MB', 50)
+
+# Por quantos segundos o título e a lista de capítulos de uma obra (sites com
+# navegador) são usados do cache sem abrir o Chrome. 0 desativa o cache.
+CACHE_OBRAS_TTL = _ler_int('MANGA_CACHE_OBRAS_TTL', 6 * 60 * 60)
+
+# Modo de acompanhamento (monitor.py): arquivo com as obras seguidas, intervalo
+# entre verificações (em segundos) para sites de API e de navegador, e quantas
+# obras de um mesmo site de API são verificadas ao mesmo tempo. Sites com
+# navegador verificam uma obra por vez, com um navegador por site.
+ARQUIVO_BIBLIOTECA = os.environ.get('MANGA_BIBLIOTECA', 'biblioteca.json')
+INTERVALO_MONITOR_API = _ler_int('MANGA_INTERVALO_API', 15 * 60)
+INTERVALO_MONITOR_NAVEGADOR = _ler_int('MANGA_INTERVALO_NAVEGADOR', 60 * 60)
+MONITOR_CONCORRENCIA_API = _ler_int('MANGA_MONITOR_CONCORRENCIA_API', 4)
+
+# Quantos navegadores (instâncias separadas do Chrome) abrem capítulos de uma
+# mesma obra ao mesmo tempo nos sites com Selenium. 1 mantém um único navegador.
+TAMANHO_POOL_DRIVERS = _ler_int('MANGA_POOL_DRIVERS', 1)
+
+# Perfil do Chrome persistente por site (em PASTA_CACHE/perfis): mantém a
+# liberação do Cloudflare e os logins entre execuções
+PERFIL_PERSISTENTE = _ler_int('MANGA_PERFIL_PERSISTENTE', 0) == 1
+
+# Sessão do cloudscraper (cookies, liberação do Cloudflare e User-Agent) salva
+# entre execuções; mais velha que isso (em segundos) é descartada
+SESSAO_SCRAPER_TTL = _ler_int('MANGA_SESSAO_TTL', 24 * 60 * 60)
+
+# Em main.py, começa a abrir o navegador assim que a URL é de um site com
+# Selenium, enquanto o usuário responde às perguntas (0 desliga)
+PRE_INICIAR_NAVEGADOR = _ler_int('MANGA_PRE_INICIAR_NAVEGADOR', 1) == 1
+
+# Quantos índices de página são testados ao mesmo tempo na busca pelo fim do
+# capítulo, nos sites em que as URLs das páginas são adivinhadas
+SONDAGEM_CONCORRENCIA = _ler_int('MANGA_SONDAGEM_CONCORRENCIA', 8)
+
+# Até quantas conexões por host o controle de taxa pode subir quando o servidor
+# responde bem (começa em MANGA_MAX_CONEXOES_HOST; ver controle_taxa.py)
+LIMITE_CONEXOES_POR_HOST = _ler_int('MANGA_LIMITE_CONEXOES_HOST', 16)
+
+# Tentativas de cada imagem (com espera crescente entre elas) antes de ir para a
+# fila de repetição do fim do lote
+TENTATIVAS_DOWNLOAD = _ler_int('MANGA_TENTATIVAS', 3)
+
+# Um download mais lento que isso (KB/s) durante a janela (segundos) é abortado
+# e tentado de novo, continuando de onde parou quando o servidor aceita Range
+VAZAO_MINIMA_KB = _ler_int('MANGA_VAZAO_MINIMA_KB', 8)
+JANELA_TRAVAMENTO = _ler_int('MANGA_JANELA_TRAVAMENTO', 15)
+
+# Requisições "hedged" entre espelhos de CDN: se o espelho preferido não responde
+# dentro do p95 dele, a mesma imagem é pedida ao próximo (ver espelhos.py)
+USAR_ESPELHOS = _ler_int('MANGA_ESPELHOS_HEDGE', 1) == 1
+
+# Grupos extras de espelhos: hosts separados por '|', grupos por ';'
+# (ex: "cdn.a.com|cdn.b.com;img1.x.net|img2.x.net")
+ESPELHOS_EXTRA = [grupo.split('|') for grupo in os.environ.get('MANGA_ESPELHOS', '').split(';') if '|' in grupo]
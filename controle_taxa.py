@@ -0,0 +1,226 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from config import MAX_CONEXOES_POR_HOST, LIMITE_CONEXOES_POR_HOST
+
+# ==============================================================================
+# CONTROLE DE TAXA POR HOST (AIMD)
+# Cada host (CDN) tem um limite de conexões simultâneas e um intervalo mínimo
+# entre o início das requisições, ajustados sozinhos: enquanto as respostas
+# chegam bem e sem aumento de latência, o limite sobe aos poucos (aditivo);
+# num 429/503 ou desafio do Cloudflare, o limite cai pela metade e o intervalo
+# dobra (multiplicativo), respeitando o Retry-After. Serve tanto para o motor
+# de download (asyncio) quanto para código com threads.
+# ==============================================================================
+
+# Maior pausa aceita de um Retry-After, em segundos
+RETRY_AFTER_MAXIMO = 120
+
+# Intervalo entre requisições aplicado no primeiro corte e o máximo ao qual pode chegar
+INTERVALO_INICIAL_CORTE = 0.25
+INTERVALO_MAXIMO = 5.0
+
+# Janela de respostas usada para a taxa de erros e a fração que provoca um corte
+JANELA_ERROS = 20
+TAXA_ERROS_CORTE = 0.3
+
+# Latência (média móvel) acima deste múltiplo da melhor já vista segura o aumento
+FATOR_LATENCIA_SAUDAVEL = 3.0
+
+def desafio_do_cloudflare(status, headers):
+    """Indica se a resposta é um desafio/bloqueio do Cloudflare (403/503)."""
+    if status not in (403, 503):
+        return False
+    return (headers.get('cf-mitigated') == 'challenge'
+            or headers.get('Server', '').lower().startswith('cloudflare'))
+
+def ler_retry_after(valor):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos."""
+    if not valor:
+        return None
+    try:
+        segundos = float(valor)
+    except ValueError:
+        try:
+            segundos = parsedate_to_datetime(valor).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(segundos, 0), RETRY_AFTER_MAXIMO)
+
+class ControleDoHost:
+    """Limite de concorrência e de taxa de um host, ajustado pelas respostas."""
+
+    def __init__(self, host, limite_inicial=MAX_CONEXOES_POR_HOST, limite_maximo=LIMITE_CONEXOES_POR_HOST):
+        self.host = host
+        self.limite = float(limite_inicial)
+        self.limite_maximo = max(limite_maximo, limite_inicial)
+        self.em_uso = 0
+        self.intervalo = 0.0
+        self._proximo_inicio = 0.0
+        self._pausado_ate = 0.0
+        self._ultimo_corte = 0.0
+        self.latencia_media = None
+        self.melhor_latencia = None
+        self._janela = deque(maxlen=JANELA_ERROS)
+        self.sucessos = 0
+        self.erros = 0
+        self.cortes = 0
+        self._condicao = threading.Condition()
+
+    def _espera_necessaria(self):
+        """Segundos até poder começar mais uma requisição (0 = pode agora). Chamar com a trava."""
+        agora = time.monotonic()
+        espera = max(self._pausado_ate - agora, self._proximo_inicio - agora, 0)
+        if espera == 0 and self.em_uso >= max(1, int(self.limite)):
+            return None  # Sem vaga: espera alguém liberar
+        return espera
+
+    def _tentar_reservar(self):
+        """Reserva uma vaga se possível; senão retorna quanto esperar (None = até uma liberação)."""
+        with self._condicao:
+            espera = self._espera_necessaria()
+            if espera == 0:
+                self.em_uso += 1
+                self._proximo_inicio = time.monotonic() + self.intervalo
+            return espera
+
+    def adquirir(self):
+        """Espera (bloqueando a thread) até poder fazer mais uma requisição ao host."""
+        with self._condicao:
+            while True:
+                espera = self._espera_necessaria()
+                if espera == 0:
+                    self.em_uso += 1
+                    self._proximo_inicio = time.monotonic() + self.intervalo
+                    return
+                self._condicao.wait(timeout=espera)
+
+    def tentar_adquirir(self):
+        """Reserva uma vaga só se houver uma agora, sem esperar. Retorna True se reservou."""
+        return self._tentar_reservar() == 0
+
+    async def adquirir_async(self):
+        """Versão para o event loop: espera sem bloquear as outras corrotinas."""
+        while True:
+            espera = self._tentar_reservar()
+            if espera == 0:
+                return
+            await asyncio.sleep(0.05 if espera is None else espera)
+
+    def liberar(self, status=None, headers=None, latencia=None, erro=False, cancelada=False):
+        """
+        Devolve a vaga e ajusta o controle pela resposta: `status` e `headers` da
+        resposta (None se nem houve resposta), `latencia` até os cabeçalhos e
+        `erro` para falhas de conexão/timeout. `cancelada` só devolve a vaga (ex:
+        requisição a um espelho que perdeu a corrida), sem contar a favor nem contra.
+        """
+        headers = headers or {}
+        with self._condicao:
+            self.em_uso = max(0, self.em_uso - 1)
+            if cancelada:
+                self._condicao.notify_all()
+                return
+            agora = time.monotonic()
+            congestionado = status in (429, 503) or desafio_do_cloudflare(status, headers)
+            falhou = erro or congestionado or (status is not None and status >= 500)
+            self._janela.append(not falhou)
+            if falhou:
+                self.erros += 1
+            else:
+                self.sucessos += 1
+
+            if congestionado:
+                retry_after = ler_retry_after(headers.get('Retry-After'))
+                if retry_after:
+                    self._pausado_ate = max(self._pausado_ate, agora + retry_after)
+                self._cortar(agora)
+            elif len(self._janela) >= JANELA_ERROS // 2 and self._janela.count(False) / len(self._janela) > TAXA_ERROS_CORTE:
+                self._cortar(agora)
+            elif not falhou and latencia is not None:
+                self._registrar_latencia(latencia)
+                if self.latencia_media <= self.melhor_latencia * FATOR_LATENCIA_SAUDAVEL:
+                    # Aumento aditivo: cerca de +1 conexão a cada `limite` respostas boas
+                    self.limite = min(self.limite_maximo, self.limite + 1 / self.limite)
+                    self.intervalo = self.intervalo * 0.9 if self.intervalo > 0.01 else 0.0
+            self._condicao.notify_all()
+
+    def _registrar_latencia(self, latencia):
+        self.latencia_media = latencia if self.latencia_media is None else 0.8 * self.latencia_media + 0.2 * latencia
+        self.melhor_latencia = self.latencia_media if self.melhor_latencia is None else min(self.melhor_latencia, self.latencia_media)
+
+    def _cortar(self, agora):
+        """Corte multiplicativo; respostas ruins que chegam juntas contam como um corte só."""
+        if agora - self._ultimo_corte < max(1.0, self.latencia_media or 0):
+            return
+        self._ultimo_corte = agora
+        self.cortes += 1
+        self.limite = max(1.0, self.limite / 2)
+        self.intervalo = min(INTERVALO_MAXIMO, max(INTERVALO_INICIAL_CORTE, self.intervalo * 2))
+        self._janela.clear()
+        print(f"\n    -> {self.host} pediu para desacelerar: até {int(self.limite)} conexões, "
+              f"{self.intervalo:.2f}s entre requisições.")
+
+    @contextmanager
+    def usar(self):
+        """
+        Bloco com uma vaga reservada, para código com threads. O dicionário entregue
+        recebe 'status' e 'headers' da resposta (ou 'erro': True) para o ajuste.
+        """
+        self.adquirir()
+        uso = {'status': None, 'headers': None, 'erro': False}
+        inicio = time.monotonic()
+        try:
+            yield uso
+        except Exception:
+            uso['erro'] = True
+            raise
+        finally:
+            self.liberar(uso['status'], uso['headers'], time.monotonic() - inicio, uso['erro'])
+
+    def estado(self):
+        with self._condicao:
+            return {
+                'host': self.host,
+                'limite': int(self.limite),
+                'em_uso': self.em_uso,
+                'intervalo': round(self.intervalo, 3),
+                'latencia_ms': round(self.latencia_media * 1000) if self.latencia_media is not None else None,
+                'sucessos': self.sucessos,
+                'erros': self.erros,
+                'cortes': self.cortes,
+                'pausado_por': round(max(0, self._pausado_ate - time.monotonic()), 1),
+            }
+
+_controles = {}
+_trava_controles = threading.Lock()
+
+def controle_do_host(url):
+    """Retorna o controle do host da URL, criando-o no primeiro uso."""
+    host = urlparse(url).netloc
+    with _trava_controles:
+        controle = _controles.get(host)
+        if controle is None:
+            controle = ControleDoHost(host)
+            _controles[host] = controle
+        return controle
+
+def estado_hosts():
+    """Estado atual de cada host já usado: quanto cada CDN está aguentando."""
+    with _trava_controles:
+        controles = list(_controles.values())
+    return [controle.estado() for controle in controles]
+
+def imprimir_estado_hosts():
+    estados = estado_hosts()
+    if not estados:
+        return
+    print("Conexões por servidor de imagens:")
+    for estado in estados:
+        latencia = f"{estado['latencia_ms']}ms" if estado['latencia_ms'] is not None else "-"
+        print(f"  {estado['host']}: até {estado['limite']} conexões, {estado['intervalo']:.2f}s entre requisições, "
+              f"latência {latencia}, {estado['sucessos']} ok / {estado['erros']} erros, {estado['cortes']} cortes")
@@ -1,76 +1,254 @@
-import os
-import zipfile
-from PIL import Image
-
-def criar_pdf_de_imagens(lista_imagens, pasta_base_imagens, caminho_pdf_saida):
-    if os.path.exists(caminho_pdf_saida):
-        print(f"  [⏩] PDF já existe, pulando: {os.path.basename(caminho_pdf_saida)}")
-        return True
-
-    imagens_processadas = []
-    largura_padrao = 0
-
-    # Primeiro, abre a primeira imagem para definir a largura padrão para todas as páginas
-    if lista_imagens:
-        try:
-            primeira_img_path = os.path.join(pasta_base_imagens, lista_imagens[0])
-            with Image.open(primeira_img_path) as img:
-                largura_padrao = img.width
-        except Exception as e:
-            print(f"  [x] Erro ao ler a primeira imagem para definir o padrão: {e}")
-            return False
-
-    if largura_padrao == 0:
-        print("  [!] Não foi possível definir uma largura padrão para o PDF.")
-        return False
-
-    # Processa todas as imagens da lista
-    for nome_arquivo in lista_imagens:
-        img_path = os.path.join(pasta_base_imagens, nome_arquivo)
-        try:
-            # Abre a imagem e converte para RGB para consistência
-            img = Image.open(img_path).convert("RGB")
-            
-            # Se a largura da imagem for diferente da padrão, redimensiona
-            if img.width != largura_padrao:
-                # Calcula a nova altura para manter a proporção
-                altura_proporcional = int((largura_padrao / float(img.width)) * img.height)
-                img = img.resize((largura_padrao, altura_proporcional), Image.Resampling.LANCZOS)
-            
-            imagens_processadas.append(img)
-        except Exception as e:
-            print(f"  [x] Erro ao processar a imagem {nome_arquivo}: {e}")
-
-    if not imagens_processadas:
-        print("  [!] Nenhuma imagem válida encontrada para criar o PDF.")
-        return False
-
-    try:
-        # A primeira imagem da lista processada será a base, e as outras serão anexadas
-        primeira_imagem = imagens_processadas[0]
-        imagens_restantes = imagens_processadas[1:]
-        
-        primeira_imagem.save(
-            caminho_pdf_saida, "PDF", resolution=100.0, save_all=True, append_images=imagens_restantes
-        )
-        print(f"  [✔] PDF criado com sucesso: {os.path.basename(caminho_pdf_saida)}")
-        return True
-    except Exception as e:
-        print(f"  [x] Erro ao salvar o PDF final: {e}")
-        return False
-
-
-def criar_cbz_de_imagens(lista_imagens, pasta_base_imagens, caminho_cbz_saida):
-    if os.path.exists(caminho_cbz_saida):
-        print(f"  [⏩] CBZ já existe, pulando: {os.path.basename(caminho_cbz_saida)}")
-        return True
-    try:
-        with zipfile.ZipFile(caminho_cbz_saida, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for nome_arquivo in lista_imagens:
-                caminho_completo = os.path.join(pasta_base_imagens, nome_arquivo)
-                zf.write(caminho_completo, arcname=nome_arquivo)
-        print(f"  [✔] CBZ criado com sucesso: {os.path.basename(caminho_cbz_saida)}")
-        return True
-    except Exception as e:
-        print(f"  [x] Erro ao criar o arquivo CBZ {os.path.basename(caminho_cbz_saida)}: {e}")
-        return False
\ No newline at end of file
+import io
+import os
+import time
+import shutil
+import zipfile
+from PIL import Image
+from natsort import natsorted
+
+from config import MODO_LAYOUT_PDF
+
+# Resolução usada para converter pixels em pontos do PDF (mesma de antes: 100 dpi)
+RESOLUCAO_PDF = 100.0
+
+class EscritorPDF:
+    """
+    Escreve um PDF página por página direto no disco. Só uma imagem fica em memória
+    por vez, e arquivos JPEG são embutidos como estão (DCTDecode), sem decodificar.
+    """
+
+    def __init__(self, caminho):
+        self.arquivo = open(caminho, 'wb')
+        self.posicoes = {}
+        self.paginas = []
+        # Objeto 1 é o catálogo e o 2 é a árvore de páginas, escritos no final
+        self.proximo_objeto = 3
+        self.arquivo.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _novo_objeto(self):
+        numero = self.proximo_objeto
+        self.proximo_objeto += 1
+        return numero
+
+    def _escrever_objeto(self, numero, conteudo):
+        self.posicoes[numero] = self.arquivo.tell()
+        self.arquivo.write(f"{numero} 0 obj\n".encode() + conteudo + b"\nendobj\n")
+
+    def _escrever_stream(self, numero, dicionario, tamanho, escrever_dados):
+        self.posicoes[numero] = self.arquivo.tell()
+        self.arquivo.write(f"{numero} 0 obj\n<< {dicionario} /Length {tamanho} >>\nstream\n".encode())
+        escrever_dados(self.arquivo)
+        self.arquivo.write(b"\nendstream\nendobj\n")
+
+    def adicionar_jpeg(self, largura, altura, modo, tamanho, escrever_dados, largura_exibida=None):
+        """
+        Adiciona uma página a partir de dados JPEG (de um arquivo ou recém-codificados).
+        Com `largura_exibida` (em pixels), a página é dimensionada como se a imagem
+        tivesse essa largura: o leitor escala a imagem, sem reamostrar os pixels.
+        """
+        espaco_cor = '/DeviceGray' if modo == 'L' else '/DeviceRGB'
+        imagem = self._novo_objeto()
+        self._escrever_stream(
+            imagem,
+            f"/Type /XObject /Subtype /Image /Width {largura} /Height {altura} "
+            f"/ColorSpace {espaco_cor} /BitsPerComponent 8 /Filter /DCTDecode",
+            tamanho, escrever_dados,
+        )
+
+        escala = (largura_exibida / float(largura)) if largura_exibida else 1.0
+        largura_pt = largura * escala * 72.0 / RESOLUCAO_PDF
+        altura_pt = altura * escala * 72.0 / RESOLUCAO_PDF
+        desenho = f"q {largura_pt:.4f} 0 0 {altura_pt:.4f} 0 0 cm /Im0 Do Q".encode()
+        conteudo = self._novo_objeto()
+        self._escrever_stream(conteudo, "", len(desenho), lambda f: f.write(desenho))
+
+        pagina = self._novo_objeto()
+        self._escrever_objeto(pagina, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {largura_pt:.4f} {altura_pt:.4f}] "
+            f"/Resources << /XObject << /Im0 {imagem} 0 R >> >> /Contents {conteudo} 0 R >>"
+        ).encode())
+        self.paginas.append(pagina)
+
+    def fechar(self):
+        """Escreve a árvore de páginas, o catálogo e a tabela xref, e fecha o arquivo."""
+        filhos = ' '.join(f"{pagina} 0 R" for pagina in self.paginas)
+        self._escrever_objeto(2, f"<< /Type /Pages /Kids [{filhos}] /Count {len(self.paginas)} >>".encode())
+        self._escrever_objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        inicio_xref = self.arquivo.tell()
+        linhas = [f"xref\n0 {self.proximo_objeto}\n", "0000000000 65535 f \n"]
+        for numero in range(1, self.proximo_objeto):
+            linhas.append(f"{self.posicoes[numero]:010d} 00000 n \n")
+        linhas.append(f"trailer\n<< /Size {self.proximo_objeto} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n")
+        self.arquivo.write(''.join(linhas).encode())
+        self.arquivo.close()
+
+def _adicionar_pagina_pdf(escritor, img_path, largura_padrao, modo_layout=MODO_LAYOUT_PDF):
+    """Adiciona uma imagem ao PDF, decodificando-a apenas quando necessário."""
+    usar_lanczos = modo_layout == 'lanczos'
+    with Image.open(img_path) as img:
+        # No modo 'escala' a largura é ajustada na página, então qualquer JPEG comum
+        # (RGB/cinza) é copiado sem recodificar; no 'lanczos', só os da largura certa
+        pode_copiar = img.format == 'JPEG' and img.mode in ('RGB', 'L')
+        if pode_copiar and (not usar_lanczos or img.width == largura_padrao):
+            largura, altura, modo = img.width, img.height, img.mode
+            tamanho = os.path.getsize(img_path)
+
+            def copiar_arquivo(destino):
+                with open(img_path, 'rb') as origem:
+                    shutil.copyfileobj(origem, destino)
+
+            escritor.adicionar_jpeg(largura, altura, modo, tamanho, copiar_arquivo, largura_exibida=largura_padrao)
+            return
+
+        # WebP/AVIF/PNG (com transparência), CMYK ou LANCZOS: precisa decodificar
+        altura_proporcional = int((largura_padrao / float(img.width)) * img.height)
+        if img.format == 'JPEG':
+            # Deixa o próprio decodificador JPEG reduzir a imagem (1/2, 1/4, 1/8) quando
+            # ela é bem maior que o necessário; o resultado nunca fica menor que o pedido
+            img.draft('RGB', (largura_padrao, altura_proporcional))
+        img = img.convert("RGB")
+
+        if usar_lanczos and img.width != largura_padrao:
+            # reducing_gap faz um reduce() rápido antes do LANCZOS em reduções grandes
+            img = img.resize((largura_padrao, altura_proporcional), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        elif img.width >= 2 * largura_padrao:
+            # Sem reamostrar: só descarta pixels que o leitor nunca mostraria
+            img = img.reduce(img.width // largura_padrao)
+
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG")
+        dados = buffer.getvalue()
+        escritor.adicionar_jpeg(img.width, img.height, 'RGB', len(dados), lambda f: f.write(dados),
+                                largura_exibida=largura_padrao)
+
+def criar_pdf_de_imagens(lista_imagens, pasta_base_imagens, caminho_pdf_saida):
+    if os.path.exists(caminho_pdf_saida):
+        print(f"  [⏩] PDF já existe, pulando: {os.path.basename(caminho_pdf_saida)}")
+        return True
+
+    largura_padrao = 0
+
+    # Primeiro, abre a primeira imagem para definir a largura padrão para todas as páginas
+    if lista_imagens:
+        try:
+            primeira_img_path = os.path.join(pasta_base_imagens, lista_imagens[0])
+            with Image.open(primeira_img_path) as img:
+                largura_padrao = img.width
+        except Exception as e:
+            print(f"  [x] Erro ao ler a primeira imagem para definir o padrão: {e}")
+            return False
+
+    if largura_padrao == 0:
+        print("  [!] Não foi possível definir uma largura padrão para o PDF.")
+        return False
+
+    # O PDF é escrito em um arquivo temporário e só ganha o nome final quando está completo
+    caminho_temporario = caminho_pdf_saida + '.part'
+    try:
+        escritor = EscritorPDF(caminho_temporario)
+        try:
+            # Processa as imagens uma a uma, sem acumulá-las em memória
+            for nome_arquivo in lista_imagens:
+                img_path = os.path.join(pasta_base_imagens, nome_arquivo)
+                try:
+                    _adicionar_pagina_pdf(escritor, img_path, largura_padrao)
+                except Exception as e:
+                    print(f"  [x] Erro ao processar a imagem {nome_arquivo}: {e}")
+        finally:
+            escritor.fechar()
+
+        if not escritor.paginas:
+            print("  [!] Nenhuma imagem válida encontrada para criar o PDF.")
+            os.remove(caminho_temporario)
+            return False
+
+        os.replace(caminho_temporario, caminho_pdf_saida)
+        print(f"  [✔] PDF criado com sucesso: {os.path.basename(caminho_pdf_saida)}")
+        return True
+    except Exception as e:
+        print(f"  [x] Erro ao salvar o PDF final: {e}")
+        if os.path.exists(caminho_temporario):
+            os.remove(caminho_temporario)
+        return False
+
+
+# Formatos que já vêm comprimidos: passar pelo deflate gasta CPU sem reduzir o tamanho
+EXTENSOES_JA_COMPRIMIDAS = ('.jpg', '.jpeg', '.png', '.webp', '.avif', '.gif')
+
+def _compressao_da_entrada(nome_arquivo):
+    """Escolhe, por arquivo, se a entrada do CBZ é apenas armazenada ou comprimida."""
+    if nome_arquivo.lower().endswith(EXTENSOES_JA_COMPRIMIDAS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+class EscritorCBZ:
+    """
+    Monta um CBZ em um arquivo '.part', que só ganha o nome final em concluir().
+    As páginas podem vir de arquivos na pasta do capítulo ou direto do download
+    (ver downloader.baixar_capitulo_preparado), sempre na ordem de leitura.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.caminho_parcial = caminho + '.part'
+        self._zip = zipfile.ZipFile(self.caminho_parcial, 'w', zipfile.ZIP_DEFLATED)
+
+    def adicionar_arquivo(self, caminho_imagem, nome_arquivo):
+        self._zip.write(caminho_imagem, arcname=nome_arquivo, compress_type=_compressao_da_entrada(nome_arquivo))
+
+    def adicionar_dados(self, nome_arquivo, origem):
+        """Copia uma página de um objeto de arquivo (ex: um temporário) para o CBZ."""
+        info = zipfile.ZipInfo(nome_arquivo, date_time=time.localtime()[:6])
+        info.compress_type = _compressao_da_entrada(nome_arquivo)
+        with self._zip.open(info, 'w') as destino:
+            shutil.copyfileobj(origem, destino, 64 * 1024)
+
+    def concluir(self):
+        self._zip.close()
+        os.replace(self.caminho_parcial, self.caminho)
+
+    def descartar(self):
+        self._zip.close()
+        if os.path.exists(self.caminho_parcial):
+            os.remove(self.caminho_parcial)
+
+def criar_cbz_de_imagens(lista_imagens, pasta_base_imagens, caminho_cbz_saida):
+    if os.path.exists(caminho_cbz_saida):
+        print(f"  [⏩] CBZ já existe, pulando: {os.path.basename(caminho_cbz_saida)}")
+        return True
+    escritor = None
+    try:
+        escritor = EscritorCBZ(caminho_cbz_saida)
+        for nome_arquivo in lista_imagens:
+            escritor.adicionar_arquivo(os.path.join(pasta_base_imagens, nome_arquivo), nome_arquivo)
+        escritor.concluir()
+        print(f"  [✔] CBZ criado com sucesso: {os.path.basename(caminho_cbz_saida)}")
+        return True
+    except Exception as e:
+        print(f"  [x] Erro ao criar o arquivo CBZ {os.path.basename(caminho_cbz_saida)}: {e}")
+        if escritor is not None:
+            escritor.descartar()
+        return False
+
+def converter_capitulo(chapter_path, obra_folder_name, chapter_folder_name, formatos_desejados):
+    """
+    Converte a pasta de imagens de um capítulo para os formatos pedidos (PDF/CBZ).
+    Roda em um processo separado (ver pipeline.py); quem chama decide se apaga a
+    pasta original. Retorna True se todas as conversões foram concluídas.
+    """
+    print(f"  [→] Iniciando conversão para: {', '.join(formatos_desejados)}")
+    imagens_na_pasta = natsorted([f for f in os.listdir(chapter_path) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.avif'))])
+    
+    conversoes_ok = 0
+    if 'PDF' in formatos_desejados:
+        caminho_pdf = os.path.join(obra_folder_name, f"{chapter_folder_name}.pdf")
+        if criar_pdf_de_imagens(imagens_na_pasta, chapter_path, caminho_pdf):
+            conversoes_ok +=1
+    
+    if 'CBZ' in formatos_desejados:
+        caminho_cbz = os.path.join(obra_folder_name, f"{chapter_folder_name}.cbz")
+        if criar_cbz_de_imagens(imagens_na_pasta, chapter_path, caminho_cbz):
+            conversoes_ok +=1
+
+    return conversoes_ok == len(formatos_desejados)
@@ -0,0 +1,587 @@
+import os
+import time
+import random
+import asyncio
+import hashlib
+import tempfile
+import threading
+import importlib.util
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # httpx é opcional; sem ele usamos uma requests.Session
+    httpx = None
+
+from config import MAX_DOWNLOADS_SIMULTANEOS, USAR_HTTP2, TENTATIVAS_DOWNLOAD, VAZAO_MINIMA_KB, JANELA_TRAVAMENTO, USAR_ESPELHOS
+from controle_taxa import controle_do_host, ler_retry_after
+from espelhos import urls_em_ordem, atraso_do_hedge, registrar_latencia, registrar_perdedor, registrar_falha, registrar_hedge
+
+# ==============================================================================
+# MOTOR DE DOWNLOAD (asyncio)
+# Todos os sites entregam aqui a lista de páginas de um capítulo como jobs
+# (url, headers, cookies, destino). Um único event loop roda em uma thread
+# própria e vive durante todo o programa, então as conexões (keep-alive e,
+# se disponível, HTTP/2) são reaproveitadas de um capítulo para o outro.
+# ==============================================================================
+
+TAMANHO_BLOCO = 64 * 1024
+# Páginas baixadas fora de ordem no modo CBZ direto ficam na memória até este
+# tamanho; acima disso vão para um temporário no disco local
+TAMANHO_MAXIMO_EM_MEMORIA = 8 * 1024 * 1024
+
+# Respostas que indicam um problema passageiro do servidor: vale tentar de novo
+STATUS_RECUPERAVEIS = {408, 425, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524}
+ESPERA_BASE_REPETICAO = 1.0
+ESPERA_MAXIMA_REPETICAO = 30.0
+# Pausa antes de repetir, no fim do lote, as páginas que esgotaram as tentativas
+ESPERA_FILA_REPETICAO = 5
+
+def ajustar_pool_conexoes(session, tamanho):
+    """
+    Aumenta o pool de conexões dos adapters já montados na sessão, sem trocá-los.
+    Trocar o adapter do cloudscraper perderia a configuração de TLS que ele usa
+    para passar pelo Cloudflare, então apenas reinicializamos o pool existente.
+    """
+    for adapter in session.adapters.values():
+        if getattr(adapter, '_pool_maxsize', tamanho) >= tamanho:
+            continue
+        adapter._pool_maxsize = tamanho
+        adapter.init_poolmanager(adapter._pool_connections, tamanho, block=adapter._pool_block)
+
+def _cookies_para_host(cookies, url):
+    """Retorna um dict nome->valor apenas com os cookies válidos para o host da URL."""
+    if not cookies:
+        return {}
+    if isinstance(cookies, dict):
+        return dict(cookies)
+    host = urlparse(url).hostname or ''
+    resultado = {}
+    for cookie in cookies:
+        dominio = (cookie.domain or '').lstrip('.')
+        if not dominio or host == dominio or host.endswith('.' + dominio):
+            resultado[cookie.name] = cookie.value
+    return resultado
+
+
+class _RespostaSessao:
+    """Resposta de uma requests.Session lida em blocos por uma thread do executor."""
+
+    def __init__(self, response, loop, executor):
+        self._response = response
+        self._loop = loop
+        self._executor = executor
+        self.status = response.status_code
+        self.headers = response.headers
+
+    async def blocos(self):
+        iterador = self._response.iter_content(chunk_size=TAMANHO_BLOCO)
+        while True:
+            bloco = await self._loop.run_in_executor(self._executor, next, iterador, None)
+            if bloco is None:
+                break
+            yield bloco
+
+    async def fechar(self):
+        self._response.close()
+
+
+class _RespostaHttpx:
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+
+    async def blocos(self):
+        async for bloco in self._response.aiter_bytes(TAMANHO_BLOCO):
+            yield bloco
+
+    async def fechar(self):
+        await self._response.aclose()
+
+
+class MotorDeDownload:
+    """Mantém o event loop e os clientes HTTP compartilhados (os limites por host ficam em controle_taxa)."""
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._trava = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_DOWNLOADS_SIMULTANEOS * 2)
+        self._cliente_httpx = None
+        self._sessao_padrao = None
+
+    def _garantir_loop(self):
+        with self._trava:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def executar(self, coro):
+        """Executa uma corrotina no loop do motor e espera o resultado."""
+        loop = self._garantir_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def _obter_cliente_httpx(self):
+        if self._cliente_httpx is None:
+            http2 = USAR_HTTP2 and importlib.util.find_spec('h2') is not None
+            self._cliente_httpx = httpx.AsyncClient(
+                http2=http2,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=MAX_DOWNLOADS_SIMULTANEOS * 2,
+                    max_keepalive_connections=MAX_DOWNLOADS_SIMULTANEOS * 2,
+                ),
+            )
+        return self._cliente_httpx
+
+    async def abrir(self, url, headers=None, cookies=None, sessao=None, timeout=30):
+        """
+        Faz o GET em modo stream e retorna a resposta assim que os cabeçalhos chegam.
+        Com `sessao` (ex: o cloudscraper) a requisição usa o pool e os cookies dela;
+        sem sessão usa o cliente httpx compartilhado (ou uma requests.Session padrão).
+        """
+        if sessao is None and httpx is not None:
+            headers = dict(headers or {})
+            cookies_host = _cookies_para_host(cookies, url)
+            if cookies_host:
+                headers['Cookie'] = '; '.join(f"{nome}={valor}" for nome, valor in cookies_host.items())
+            cliente = self._obter_cliente_httpx()
+            request = cliente.build_request('GET', url, headers=headers, timeout=timeout)
+            return _RespostaHttpx(await cliente.send(request, stream=True))
+
+        if sessao is None:
+            if self._sessao_padrao is None:
+                self._sessao_padrao = requests.Session()
+                ajustar_pool_conexoes(self._sessao_padrao, MAX_DOWNLOADS_SIMULTANEOS * 2)
+            sessao = self._sessao_padrao
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self._executor,
+            lambda: sessao.get(url, headers=headers, cookies=cookies, stream=True, timeout=timeout),
+        )
+        return _RespostaSessao(response, loop, self._executor)
+
+_motor = MotorDeDownload()
+
+
+class _RenovacaoDeAcesso:
+    """Garante que a função de renovação (ex: sincronizar cookies) rode uma vez por lote."""
+
+    def __init__(self, funcao):
+        self.funcao = funcao
+        self.trava = asyncio.Lock()
+        self.feita = False
+
+    async def executar(self):
+        async with self.trava:
+            if not self.feita:
+                self.feita = True
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(_motor._executor, self.funcao)
+
+class _GravacaoEmOrdem:
+    """
+    Entrega as páginas ao escritor do CBZ na ordem dos jobs, mesmo que os downloads
+    terminem fora de ordem. As páginas adiantadas esperam em arquivos temporários.
+    """
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.prontas = {}
+        self.proxima = 0
+        self.erro = None
+        self.trava = asyncio.Lock()
+
+    async def entregar(self, indice, nome_arquivo, arquivo):
+        """`arquivo` é None quando a página falhou; a ordem segue sem ela."""
+        self.prontas[indice] = (nome_arquivo, arquivo)
+        async with self.trava:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(_motor._executor, self._gravar_prontas)
+
+    def _gravar_prontas(self):
+        while self.proxima in self.prontas:
+            nome_arquivo, arquivo = self.prontas.pop(self.proxima)
+            self.proxima += 1
+            if arquivo is None:
+                continue
+            with arquivo:
+                if self.erro is not None:
+                    continue
+                try:
+                    arquivo.seek(0)
+                    self.escritor.adicionar_dados(nome_arquivo, arquivo)
+                except Exception as e:
+                    self.erro = e
+
+class _FalhaDeTransferencia(Exception):
+    """Falha de uma tentativa de download; `recuperavel` diz se vale tentar de novo."""
+
+    def __init__(self, mensagem, recuperavel=True, retry_after=None):
+        super().__init__(mensagem)
+        self.recuperavel = recuperavel
+        self.retry_after = retry_after
+
+def _espera_para_repetir(tentativa, retry_after=None):
+    """Espera exponencial com jitter (metade fixa, metade aleatória), respeitando o Retry-After."""
+    espera = min(ESPERA_MAXIMA_REPETICAO, ESPERA_BASE_REPETICAO * 2 ** tentativa)
+    espera = espera / 2 + random.uniform(0, espera / 2)
+    return max(espera, retry_after or 0)
+
+def _inicio_do_content_range(cabecalhos):
+    """Byte inicial de um 'Content-Range: bytes 1000-1999/2000', ou None."""
+    try:
+        return int(cabecalhos.get('Content-Range', '').split()[1].split('-')[0])
+    except (IndexError, ValueError):
+        return None
+
+def _fechar_quando_chegar(tarefa):
+    """Fecha a resposta de um espelho que perdeu a corrida, assim que os cabeçalhos dela chegarem."""
+    if tarefa.cancelled() or tarefa.exception() is not None:
+        return
+    asyncio.ensure_future(tarefa.result().fechar())
+
+async def _abrir_com_espelhos(url, cabecalhos, cookies, sessao, timeout):
+    """
+    Abre a URL no espelho mais rápido (ver espelhos.py), com a vaga do controle do
+    host. Se os cabeçalhos não chegam dentro do p95 daquele espelho, a mesma
+    requisição vai também para o próximo, e fica valendo a primeira resposta boa;
+    uma falha passa direto para o espelho seguinte. Sem espelhos é só um GET.
+    Retorna (resposta, controle, latencia) com a vaga ainda reservada.
+    """
+    candidatas = urls_em_ordem(url) if USAR_ESPELHOS else [url]
+    pendentes = {}
+    hedges = set()
+    ultimo_erro = None
+    ultima_recusa = None  # (status, headers, url) do último espelho que respondeu com erro HTTP
+
+    async def enviar(url_espelho, esperar_vaga):
+        controle = controle_do_host(url_espelho)
+        if esperar_vaga:
+            await controle.adquirir_async()
+        elif not controle.tentar_adquirir():
+            return False
+        tarefa = asyncio.ensure_future(_motor.abrir(url_espelho, cabecalhos, cookies, sessao=sessao, timeout=timeout))
+        pendentes[tarefa] = (url_espelho, controle, time.monotonic())
+        return True
+
+    await enviar(candidatas.pop(0), esperar_vaga=True)
+    while True:
+        if not pendentes:
+            if not candidatas:
+                if ultima_recusa is not None:
+                    # Algum espelho respondeu: o status decide (um 404 em todos não é passageiro)
+                    status, cabecalhos_recusa, url_recusa = ultima_recusa
+                    raise _FalhaDeTransferencia(
+                        f"HTTP {status} para {url_recusa}",
+                        recuperavel=status in STATUS_RECUPERAVEIS,
+                        retry_after=ler_retry_after(cabecalhos_recusa.get('Retry-After')),
+                    )
+                # Erros de conexão, DNS, timeout...: provavelmente passageiros
+                raise _FalhaDeTransferencia(ultimo_erro)
+            await enviar(candidatas.pop(0), esperar_vaga=True)
+            continue
+
+        atraso = atraso_do_hedge(next(iter(pendentes.values()))[0]) if candidatas else None
+        prontas, _ = await asyncio.wait(pendentes, timeout=atraso, return_when=asyncio.FIRST_COMPLETED)
+        if not prontas:
+            # O espelho está mais lento que o normal dele: pede a mesma imagem ao próximo
+            # (se o próximo host não tem vaga agora, tenta de novo depois de outro atraso)
+            if await enviar(candidatas[0], esperar_vaga=False):
+                hedges.add(candidatas[0])
+                registrar_hedge(candidatas.pop(0))
+            continue
+
+        vencedora = None
+        for tarefa in prontas:
+            url_espelho, controle, inicio = pendentes.pop(tarefa)
+            latencia = time.monotonic() - inicio
+            if vencedora is not None:
+                # Chegou junto com a vencedora: não é mais necessária
+                controle.liberar(cancelada=True)
+                _fechar_quando_chegar(tarefa)
+                continue
+            try:
+                resposta = tarefa.result()
+            except Exception as e:
+                controle.liberar(erro=True)
+                registrar_falha(url_espelho)
+                ultimo_erro = f"{e.__class__.__name__}: {e}"
+                continue
+            if resposta.status >= 400 and (pendentes or candidatas):
+                # Outro espelho ainda pode ter a imagem
+                controle.liberar(resposta.status, resposta.headers, latencia)
+                registrar_falha(url_espelho)
+                ultima_recusa = (resposta.status, resposta.headers, url_espelho)
+                await resposta.fechar()
+                continue
+            if resposta.status < 400:
+                registrar_latencia(url_espelho, latencia)
+                if url_espelho in hedges:
+                    registrar_hedge(url_espelho, venceu=True)
+            vencedora = (resposta, controle, latencia)
+
+        if vencedora is None:
+            continue
+        # As requisições que perderam a corrida não são canceladas (uma requests.Session
+        # numa thread não pode ser interrompida): a resposta é fechada quando chegar
+        for tarefa, (url_espelho, controle, inicio) in pendentes.items():
+            controle.liberar(cancelada=True)
+            registrar_perdedor(url_espelho, time.monotonic() - inicio)
+            tarefa.add_done_callback(_fechar_quando_chegar)
+        return vencedora
+
+async def _blocos_vigiados(resposta):
+    """
+    Lê o corpo da resposta e aborta se nada chegar por JANELA_TRAVAMENTO segundos
+    ou se a vazão na janela ficar abaixo de VAZAO_MINIMA_KB.
+    """
+    blocos = resposta.blocos().__aiter__()
+    inicio_janela = time.monotonic()
+    bytes_janela = 0
+    while True:
+        try:
+            bloco = await asyncio.wait_for(blocos.__anext__(), timeout=JANELA_TRAVAMENTO)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise _FalhaDeTransferencia(f"download parado há {JANELA_TRAVAMENTO}s")
+        except Exception as e:
+            raise _FalhaDeTransferencia(f"{e.__class__.__name__}: {e}")
+        yield bloco
+        bytes_janela += len(bloco)
+        decorrido = time.monotonic() - inicio_janela
+        if decorrido >= JANELA_TRAVAMENTO:
+            vazao = bytes_janela / 1024 / decorrido
+            if vazao < VAZAO_MINIMA_KB:
+                raise _FalhaDeTransferencia(f"download lento demais ({vazao:.1f} KB/s)")
+            inicio_janela, bytes_janela = time.monotonic(), 0
+
+async def _transferir(url, headers, cookies, sessao, timeout, renovacao, arquivo, progresso):
+    """
+    Uma tentativa de download para `arquivo`. Se a tentativa anterior parou no meio
+    e o servidor aceita Range, pede só o que falta; senão recomeça do zero.
+    `progresso` guarda entre tentativas os bytes recebidos, o SHA-256 parcial e o
+    validador (ETag/Last-Modified) que garante que o resto é do mesmo arquivo.
+    """
+    cabecalhos = dict(headers or {})
+    retomando = progresso['recebidos'] > 0 and progresso['aceita_range']
+    if retomando:
+        cabecalhos['Range'] = f"bytes={progresso['recebidos']}-"
+        if progresso['validador']:
+            cabecalhos['If-Range'] = progresso['validador']
+
+    # Cada espelho tem o seu controle de host (ver controle_taxa.py e espelhos.py)
+    resposta = None
+    corpo_completo = False
+    try:
+        resposta, controle, latencia = await _abrir_com_espelhos(url, cabecalhos, cookies, sessao, timeout)
+        if resposta.status in (401, 403) and renovacao is not None:
+            # Cookies provavelmente expiraram: renova uma vez e tenta de novo
+            await resposta.fechar()
+            controle.liberar(resposta.status, resposta.headers, latencia)
+            resposta = None
+            await renovacao.executar()
+            resposta, controle, latencia = await _abrir_com_espelhos(url, cabecalhos, cookies, sessao, timeout)
+        try:
+            status = resposta.status
+            if status == 416 and retomando:
+                progresso['aceita_range'] = False
+                raise _FalhaDeTransferencia("o servidor recusou continuar o download; recomeçando")
+            if status >= 400:
+                raise _FalhaDeTransferencia(
+                    f"HTTP {status} para {url}",
+                    recuperavel=status in STATUS_RECUPERAVEIS,
+                    retry_after=ler_retry_after(resposta.headers.get('Retry-After')),
+                )
+            continuando = status == 206 and retomando and _inicio_do_content_range(resposta.headers) == progresso['recebidos']
+            if not continuando:
+                # Resposta completa (o servidor ignorou o Range ou é a primeira tentativa)
+                arquivo.seek(0)
+                arquivo.truncate()
+                progresso['recebidos'] = 0
+                progresso['sha256'] = hashlib.sha256()
+                progresso['aceita_range'] = resposta.headers.get('Accept-Ranges', '').lower() == 'bytes'
+                etag = resposta.headers.get('ETag', '')
+                progresso['validador'] = etag if etag and not etag.startswith('W/') else resposta.headers.get('Last-Modified')
+            recebidos_antes = progresso['recebidos']
+            async for bloco in _blocos_vigiados(resposta):
+                arquivo.write(bloco)
+                progresso['sha256'].update(bloco)
+                progresso['recebidos'] += len(bloco)
+            tamanho_anunciado = resposta.headers.get('Content-Length')
+            if (tamanho_anunciado and tamanho_anunciado.isdigit() and not resposta.headers.get('Content-Encoding')
+                    and progresso['recebidos'] - recebidos_antes < int(tamanho_anunciado)):
+                raise _FalhaDeTransferencia("a conexão fechou antes do fim da imagem")
+            corpo_completo = True
+        finally:
+            await resposta.fechar()
+    finally:
+        # Sem resposta, _abrir_com_espelhos já devolveu as vagas
+        if resposta is not None:
+            # Uma resposta de erro (4xx/5xx) é avaliada pelo status; falha no meio do corpo conta como erro
+            controle.liberar(resposta.status, resposta.headers, latencia,
+                             erro=resposta.status < 400 and not corpo_completo)
+
+async def _baixar_job(job, sessao, limite_global, timeout, renovacao, gravacao=None, indice=None):
+    url, headers, cookies, destino = job
+    nome_arquivo = os.path.basename(destino)
+    resultado = {'url': url, 'dest': destino, 'ok': False, 'tamanho': 0, 'sha256': None, 'erro': None,
+                 'recuperavel': False}
+    arquivo_parcial = destino + '.part'
+    progresso = {'recebidos': 0, 'sha256': hashlib.sha256(), 'aceita_range': False, 'validador': None}
+    arquivo = None
+    try:
+        if gravacao is None:
+            arquivo = open(arquivo_parcial, 'wb')
+        else:
+            # Modo CBZ direto: os bytes vão para o arquivo do capítulo, não para a pasta
+            arquivo = tempfile.SpooledTemporaryFile(max_size=TAMANHO_MAXIMO_EM_MEMORIA)
+        for tentativa in range(TENTATIVAS_DOWNLOAD):
+            try:
+                async with limite_global:
+                    await _transferir(url, headers, cookies, sessao, timeout, renovacao, arquivo, progresso)
+                break
+            except _FalhaDeTransferencia as e:
+                if not e.recuperavel or tentativa == TENTATIVAS_DOWNLOAD - 1:
+                    raise
+                # Espera fora do limite global, sem ocupar a vez das outras páginas
+                espera = _espera_para_repetir(tentativa, e.retry_after)
+                print(f"\n    -> {nome_arquivo}: {e}. Tentando de novo em {espera:.1f}s...")
+                await asyncio.sleep(espera)
+        resultado['tamanho'] = progresso['recebidos']
+        if gravacao is None:
+            arquivo.close()
+            # Só aparece com o nome final quando está completo
+            os.replace(arquivo_parcial, destino)
+        else:
+            await gravacao.entregar(indice, nome_arquivo, arquivo)
+        resultado['sha256'] = progresso['sha256'].hexdigest()
+        resultado['ok'] = True
+    except Exception as e:
+        resultado['erro'] = str(e)
+        resultado['recuperavel'] = isinstance(e, _FalhaDeTransferencia) and e.recuperavel
+        print(f"\n    -> Erro ao baixar a imagem {nome_arquivo}: {e}")
+        if arquivo is not None:
+            arquivo.close()
+        if gravacao is not None:
+            await gravacao.entregar(indice, nome_arquivo, None)
+        elif os.path.exists(arquivo_parcial):
+            os.remove(arquivo_parcial)
+    return resultado
+
+async def _baixar_lote(jobs, sessao, max_concorrencia, timeout, ao_negar_acesso, escritor=None):
+    limite_global = asyncio.Semaphore(max_concorrencia)
+    renovacao = _RenovacaoDeAcesso(ao_negar_acesso) if ao_negar_acesso else None
+    gravacao = _GravacaoEmOrdem(escritor) if escritor is not None else None
+    resultados = await asyncio.gather(*(
+        _baixar_job(job, sessao, limite_global, timeout, renovacao, gravacao, indice)
+        for indice, job in enumerate(jobs)
+    ))
+    if gravacao is not None and gravacao.erro is not None:
+        # O arquivo do capítulo ficou incompleto: nenhuma página conta como salva
+        print(f"\n    -> Erro ao gravar as páginas no arquivo do capítulo: {gravacao.erro}")
+        for resultado in resultados:
+            resultado['ok'] = False
+            resultado['erro'] = str(gravacao.erro)
+
+    # Fila de repetição: as páginas com falha passageira voltam no fim do lote, com
+    # menos concorrência. No modo CBZ direto a ordem das páginas já foi gravada, então
+    # elas só contam com as tentativas de cada job.
+    repetir = [i for i, resultado in enumerate(resultados) if not resultado['ok'] and resultado['recuperavel']]
+    if repetir and gravacao is None:
+        print(f"\n    -> Repetindo {len(repetir)} páginas que falharam em {ESPERA_FILA_REPETICAO}s...")
+        await asyncio.sleep(ESPERA_FILA_REPETICAO)
+        limite_repeticao = asyncio.Semaphore(max(1, max_concorrencia // 2))
+        novos = await asyncio.gather(*(
+            _baixar_job(jobs[i], sessao, limite_repeticao, timeout, renovacao) for i in repetir
+        ))
+        for i, resultado in zip(repetir, novos):
+            resultados[i] = resultado
+    return resultados
+
+def baixar_lote(jobs, sessao=None, max_concorrencia=None, timeout=30, ao_negar_acesso=None, escritor=None):
+    """
+    Baixa uma lista de jobs (url, headers, cookies, destino) com concorrência limitada
+    e calcula o SHA-256 de cada página durante o download. Falhas passageiras (rede,
+    5xx, 429, download parado) são tentadas de novo com espera crescente, continuando
+    de onde pararam quando o servidor aceita Range, e ainda voltam uma vez no fim do lote.
+    `ao_negar_acesso` é chamada (uma vez por lote) quando o servidor responde 401/403,
+    antes de uma nova tentativa. Com `escritor` (ex: conversor.EscritorCBZ) as páginas
+    são gravadas nele, na ordem dos jobs, em vez de irem para `destino`; do destino
+    só o nome do arquivo é usado. Retorna uma lista de resultados na ordem dos jobs.
+    """
+    if not jobs:
+        return []
+    if sessao is not None:
+        ajustar_pool_conexoes(sessao, MAX_DOWNLOADS_SIMULTANEOS)
+    max_concorrencia = max_concorrencia or MAX_DOWNLOADS_SIMULTANEOS
+    return _motor.executar(_baixar_lote(jobs, sessao, max_concorrencia, timeout, ao_negar_acesso, escritor))
+
+def baixar_paginas(jobs, sessao=None, max_concorrencia=None, timeout=30, ao_negar_acesso=None, escritor=None):
+    """Atalho para os handlers: baixa os jobs e retorna (sucessos, falhas)."""
+    resultados = baixar_lote(jobs, sessao=sessao, max_concorrencia=max_concorrencia,
+                             timeout=timeout, ao_negar_acesso=ao_negar_acesso, escritor=escritor)
+    sucessos = sum(1 for r in resultados if r['ok'])
+    return sucessos, len(resultados) - sucessos
+
+def preparo_do_capitulo(cap_numero, jobs, total, capturadas=0, sessao=None, ao_negar_acesso=None):
+    """
+    Descreve um capítulo cujas páginas já foram encontradas no navegador, mas ainda
+    não baixadas. Permite que o navegador siga para o próximo capítulo enquanto o
+    download deste acontece em outra etapa (ver pipeline.py). `capturadas` conta as
+    páginas que já estão na pasta do capítulo e não entram nos jobs.
+    """
+    return {
+        'cap_numero': cap_numero,
+        'jobs': jobs,
+        'total': total,
+        'capturadas': capturadas,
+        'sessao': sessao,
+        'ao_negar_acesso': ao_negar_acesso,
+    }
+
+def pode_gravar_direto(preparo):
+    """
+    Diz se as páginas do capítulo podem ir direto para o CBZ. Não podem quando
+    alguma página já está na pasta (ex: capturada da rede do navegador).
+    """
+    return preparo is not None and preparo['total'] > 0 and preparo['capturadas'] == 0
+
+def baixar_capitulo_preparado(preparo, escritor=None, manifesto=None):
+    """
+    Baixa as páginas de um capítulo preparado e retorna (sucessos, falhas) como os handlers.
+    Com `escritor` as páginas vão direto para o arquivo do capítulo (ver pode_gravar_direto).
+    Com `manifesto` (ver manifesto.py) as páginas que já estão na pasta, íntegras, não são
+    baixadas de novo, e as baixadas são registradas com tamanho e hash.
+    """
+    if preparo is None:
+        return 0, 1
+    if preparo['total'] == 0:
+        return 0, 0
+    cap_numero = preparo['cap_numero']
+    jobs = preparo['jobs']
+    ja_baixadas = 0
+    if manifesto is not None and escritor is None:
+        jobs = [job for job in jobs if not manifesto.pagina_valida(cap_numero, job[3])]
+        ja_baixadas = len(preparo['jobs']) - len(jobs)
+        if ja_baixadas:
+            print(f"    -> {ja_baixadas} páginas já estavam baixadas; faltam {len(jobs)}.")
+
+    resultados = baixar_lote(jobs, sessao=preparo['sessao'], ao_negar_acesso=preparo['ao_negar_acesso'], escritor=escritor)
+    if manifesto is not None:
+        for resultado in resultados:
+            if resultado['ok']:
+                manifesto.registrar_pagina(cap_numero, os.path.basename(resultado['dest']),
+                                           resultado['tamanho'], resultado['sha256'])
+
+    sucessos = preparo['capturadas'] + ja_baixadas + sum(1 for r in resultados if r['ok'])
+    print(f"\n  Capítulo {cap_numero}: {sucessos}/{preparo['total']} imagens baixadas com sucesso.")
+    return sucessos, preparo['total'] - sucessos
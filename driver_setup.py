@@ -1,60 +1,244 @@
-import time
-import undetected_chromedriver as uc
-
-def setup_selenium_driver(run_headless=True):
-    """
-    Configura e retorna uma instância do driver, com patches para evitar detecção.
-    """
-    print("Iniciando o navegador")
-    
-    options = uc.ChromeOptions()
-    
-    logging_prefs = {'performance': 'ALL'}
-    options.set_capability('goog:loggingPrefs', logging_prefs)
-    
-    if run_headless:
-        print(" -> Rodando em modo Headless (invisível).")
-        options.add_argument('--headless')
-        options.add_argument('--window-size=1920,1080')
-    else:
-        print(" -> Rodando em modo visível (necessário para este site).")
-
-    options.add_argument('--log-level=3')
-
-    try:
-        driver = uc.Chrome(options=options, use_subprocess=True)
-        
-        if not run_headless:
-            driver.minimize_window()
-            print("    -> Janela do navegador foi minimizada.")
-        
-        # Script para burlar detecções de bot mais avançadas
-        script = """
-            // Remove a propriedade 'webdriver' do navigator, a principal forma de detecção
-            Object.defineProperty(navigator, 'webdriver', {
-              get: () => undefined
-            });
-
-            // Bloqueia a detecção de devtools que alguns sites usam
-            const originalSetInterval = window.setInterval;
-            window.setInterval = (handler, timeout, ...args) => {
-                const handlerStr = handler.toString();
-                if (handlerStr.includes('isSuspend') && handlerStr.includes('detect')) {
-                    console.log('Timer do DisableDevtool bloqueado.');
-                    return null;
-                }
-                return originalSetInterval(handler, timeout, ...args);
-            };
-        """
-        
-        # Injeta o script para ser executado em cada novo documento/página
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": script
-        })
-
-    except Exception as e:
-        print(f"!!! ERRO ao iniciar o undetected-chromedriver: {e}")
-        print("!!! Verifique se o Google Chrome está instalado e tente novamente.")
-        return None
-        
-    return driver
\ No newline at end of file
+import os
+import time
+import shutil
+import weakref
+import tempfile
+import threading
+from contextlib import contextmanager
+import undetected_chromedriver as uc
+
+from config import CAPTURAR_IMAGENS_DA_REDE, MODO_COLHEITA, BLOQUEIO_COLHEITA_EXTRA, PERFIL_PERSISTENTE, PASTA_CACHE
+from captura_rede import habilitar_buffer_de_rede
+from perfis import reservar_perfil, liberar_perfil
+from sessao_driver import descartar_sessao
+
+# URLs bloqueadas no modo de colheita (sintaxe de curinga do Network.setBlockedURLs)
+LISTA_BLOQUEIO_PADRAO = [
+    # Imagens e mídia: o DOM continua com o 'src', só não são baixadas/decodificadas
+    '*.jpg*', '*.jpeg*', '*.png*', '*.webp*', '*.avif*', '*.gif*', '*.svg*',
+    '*.mp4*', '*.webm*', '*.mp3*',
+    # Fontes
+    '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+    # Anúncios e rastreadores de terceiros
+    '*googlesyndication.com*', '*doubleclick.net*', '*google-analytics.com*',
+    '*googletagmanager.com*', '*adservice.google.*', '*facebook.net*',
+    '*disqus.com*', '*adsco.re*', '*popads.net*', '*onclickads.net*',
+    '*adspublicidades.agency*', '*hotjar.com*', '*clarity.ms*',
+]
+
+# Lista de bloqueio configurada para cada driver em setup_selenium_driver
+_listas_bloqueio = weakref.WeakKeyDictionary()
+
+# Pasta do perfil persistente usada por cada driver (ver perfis.py)
+_perfis_dos_drivers = weakref.WeakKeyDictionary()
+
+# Cópia do chromedriver já modificado pelo undetected_chromedriver. Sem ela, cada
+# inicialização baixa e modifica o binário de novo antes de abrir o Chrome.
+PASTA_CHROMEDRIVER = os.path.join(PASTA_CACHE, 'chromedriver')
+CHROMEDRIVER_EM_CACHE = os.path.join(PASTA_CHROMEDRIVER, 'chromedriver.exe' if os.name == 'nt' else 'chromedriver')
+
+@contextmanager
+def modo_colheita(driver):
+    """
+    Bloqueia imagens, fontes, mídia e rastreadores enquanto o bloco executa.
+    Usado pelos sites na navegação das páginas de capítulo, quando só as URLs
+    das imagens são necessárias e o download é feito depois via HTTP.
+    """
+    lista = _listas_bloqueio.get(driver)
+    if not lista:
+        yield
+        return
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': lista})
+    try:
+        yield
+    finally:
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+
+def colheita_ativa(driver):
+    """Indica se o driver bloqueia imagens no modo de colheita (as imagens não chegam a carregar)."""
+    return bool(_listas_bloqueio.get(driver))
+
+def fechar_driver(driver):
+    """Fecha o navegador e libera o perfil persistente que ele estava usando."""
+    try:
+        driver.quit()
+    finally:
+        descartar_sessao(driver)
+        pasta_perfil = _perfis_dos_drivers.pop(driver, None)
+        if pasta_perfil:
+            liberar_perfil(pasta_perfil)
+
+def _guardar_chromedriver(driver):
+    """Copia para o cache o chromedriver que o undetected_chromedriver acabou de preparar."""
+    try:
+        os.makedirs(PASTA_CHROMEDRIVER, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=PASTA_CHROMEDRIVER, suffix='.part')
+        os.close(descritor)
+        shutil.copy2(driver.patcher.executable_path, temporario)
+        os.replace(temporario, CHROMEDRIVER_EM_CACHE)
+    except (OSError, AttributeError) as e:
+        print(f" -> Não foi possível guardar o chromedriver no cache: {e}")
+
+def _abrir_chrome(criar_opcoes, pasta_perfil):
+    """
+    Abre o Chrome com o chromedriver do cache, se houver. Se ele não funcionar mais
+    (ex: o Chrome foi atualizado para outra versão), apaga o cache e deixa o
+    undetected_chromedriver baixar e preparar um novo, que volta para o cache.
+    """
+    if os.path.exists(CHROMEDRIVER_EM_CACHE):
+        try:
+            return uc.Chrome(options=criar_opcoes(), use_subprocess=True, user_data_dir=pasta_perfil,
+                             driver_executable_path=CHROMEDRIVER_EM_CACHE)
+        except Exception as e:
+            print(f" -> O chromedriver do cache falhou ({e.__class__.__name__}). Preparando um novo...")
+            try:
+                os.remove(CHROMEDRIVER_EM_CACHE)
+            except OSError:
+                pass
+    # O undetected_chromedriver não aceita reaproveitar as opções de outra tentativa
+    driver = uc.Chrome(options=criar_opcoes(), use_subprocess=True, user_data_dir=pasta_perfil)
+    _guardar_chromedriver(driver)
+    return driver
+
+def setup_selenium_driver(run_headless=True, lista_bloqueio=None, perfil=None):
+    """
+    Configura e retorna uma instância do driver, com patches para evitar detecção.
+    `lista_bloqueio` define as URLs bloqueadas no modo de colheita (padrão:
+    LISTA_BLOQUEIO_PADRAO + MANGA_BLOQUEIO_EXTRA). `perfil` é o nome do perfil
+    persistente (ex: o site), usado quando MANGA_PERFIL_PERSISTENTE=1.
+    """
+    print("Iniciando o navegador")
+
+    if run_headless:
+        print(" -> Rodando em modo Headless (invisível).")
+    else:
+        print(" -> Rodando em modo visível (necessário para este site).")
+
+    def criar_opcoes():
+        options = uc.ChromeOptions()
+
+        logging_prefs = {'performance': 'ALL'}
+        options.set_capability('goog:loggingPrefs', logging_prefs)
+
+        if run_headless:
+            options.add_argument('--headless')
+            options.add_argument('--window-size=1920,1080')
+
+        options.add_argument('--log-level=3')
+        return options
+
+    pasta_perfil = None
+    if perfil and PERFIL_PERSISTENTE:
+        pasta_perfil = reservar_perfil(perfil)
+        if pasta_perfil:
+            print(f" -> Usando o perfil persistente do Chrome: {perfil}")
+        else:
+            print(f" -> Perfil '{perfil}' em uso por outro navegador. Usando um perfil temporário.")
+
+    try:
+        driver = _abrir_chrome(criar_opcoes, pasta_perfil)
+        if pasta_perfil:
+            _perfis_dos_drivers[driver] = pasta_perfil
+        
+        if not run_headless:
+            driver.minimize_window()
+            print("    -> Janela do navegador foi minimizada.")
+        
+        # Script para burlar detecções de bot mais avançadas
+        script = """
+            // Remove a propriedade 'webdriver' do navigator, a principal forma de detecção
+            Object.defineProperty(navigator, 'webdriver', {
+              get: () => undefined
+            });
+
+            // Bloqueia a detecção de devtools que alguns sites usam
+            const originalSetInterval = window.setInterval;
+            window.setInterval = (handler, timeout, ...args) => {
+                const handlerStr = handler.toString();
+                if (handlerStr.includes('isSuspend') && handlerStr.includes('detect')) {
+                    console.log('Timer do DisableDevtool bloqueado.');
+                    return null;
+                }
+                return originalSetInterval(handler, timeout, ...args);
+            };
+        """
+        
+        # Injeta o script para ser executado em cada novo documento/página
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": script
+        })
+
+        # Modo de captura: guarda os corpos das imagens para reaproveitá-los sem novo download
+        if CAPTURAR_IMAGENS_DA_REDE:
+            print(" -> Captura de imagens pela rede do navegador ativada.")
+            habilitar_buffer_de_rede(driver)
+        elif MODO_COLHEITA:
+            # A captura precisa que as imagens carreguem, então os dois modos não se combinam
+            driver.execute_cdp_cmd('Network.enable', {})
+            _listas_bloqueio[driver] = list(lista_bloqueio or LISTA_BLOQUEIO_PADRAO + BLOQUEIO_COLHEITA_EXTRA)
+
+    except Exception as e:
+        print(f"!!! ERRO ao iniciar o undetected-chromedriver: {e}")
+        print("!!! Verifique se o Google Chrome está instalado e tente novamente.")
+        if pasta_perfil:
+            liberar_perfil(pasta_perfil)
+        return None
+        
+    return driver
+
+class DriverPreguicoso:
+    """
+    Guarda as opções do navegador e só o inicia quando ele é realmente necessário
+    (ex: a lista de capítulos veio do cache e todos já foram baixados).
+    """
+
+    def __init__(self, run_headless=True, perfil=None):
+        self.run_headless = run_headless
+        self.perfil = perfil
+        self.driver = None
+        self._falhou = False
+        self._trava = threading.Lock()
+        self._pre_inicio = None
+        # Pool de navegadores extras criado pelo pipeline (ver pool_drivers.py)
+        self.pool = None
+
+    @property
+    def iniciado(self):
+        return self.driver is not None
+
+    def obter(self):
+        """Retorna o driver, iniciando o navegador na primeira chamada (None se falhar)."""
+        with self._trava:
+            if self.driver is None and not self._falhou:
+                self.driver = setup_selenium_driver(run_headless=self.run_headless, perfil=self.perfil)
+                self._falhou = self.driver is None
+            return self.driver
+
+    def iniciar_em_segundo_plano(self):
+        """
+        Começa a abrir o navegador numa thread (ex: enquanto o usuário responde às
+        perguntas). Quem chamar obter() depois espera a inicialização terminar.
+        """
+        if self.driver is None and not self._falhou and self._pre_inicio is None:
+            self._pre_inicio = threading.Thread(target=self.obter, daemon=True)
+            self._pre_inicio.start()
+
+    def descartar(self):
+        """Fecha um navegador que travou; a próxima chamada a obter() abre outro."""
+        try:
+            fechar_driver(self.driver)
+        except Exception:
+            pass
+        self.driver = None
+        self._falhou = False
+
+    def quit(self):
+        # Um navegador ainda abrindo em segundo plano também precisa ser fechado
+        if self._pre_inicio is not None:
+            self._pre_inicio.join()
+        if self.pool is not None:
+            self.pool.fechar()
+            self.pool = None
+        if self.driver is not None:
+            fechar_driver(self.driver)
+            self.driver = None
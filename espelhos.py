@@ -0,0 +1,140 @@
+import threading
+from collections import deque
+from urllib.parse import urlparse
+
+from config import ESPELHOS_EXTRA
+
+# ==============================================================================
+# ESPELHOS DE CDN
+# Alguns sites servem as mesmas imagens por mais de um host (o mesmo caminho em
+# dois CDNs). Os grupos de espelhos vêm de roteador.SITES ('espelhos') e da
+# variável MANGA_ESPELHOS; nenhum host é presumido. O motor de download guarda a
+# latência até os cabeçalhos de cada espelho, tenta primeiro o mais rápido e,
+# se ele não responder dentro do p95 de sempre, manda a mesma requisição para o
+# próximo espelho e fica com a primeira resposta (requisição "hedged").
+# ==============================================================================
+
+# Latências guardadas por host (as mais antigas saem primeiro)
+AMOSTRAS_POR_HOST = 50
+
+# Com poucas amostras o p95 não diz nada: usa um atraso fixo até o hedge
+MINIMO_AMOSTRAS = 5
+ATRASO_PADRAO = 1.0
+ATRASO_MINIMO = 0.2
+
+# Latência registrada para uma falha (erro de conexão ou status ruim), para o
+# espelho problemático ir para o fim da fila
+PENALIDADE_FALHA = 10.0
+
+_grupos = {}
+_latencias = {}
+_contadores = {}
+_trava = threading.Lock()
+
+def registrar_espelhos(hosts):
+    """Declara que todos os `hosts` servem os mesmos caminhos."""
+    hosts = tuple(dict.fromkeys(h.strip().lower() for h in hosts if h.strip()))
+    if len(hosts) < 2:
+        return
+    with _trava:
+        for host in hosts:
+            _grupos[host] = hosts
+
+for _grupo in ESPELHOS_EXTRA:
+    registrar_espelhos(_grupo)
+
+def _percentil(amostras, fracao):
+    ordenadas = sorted(amostras)
+    return ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))]
+
+def _contador(host):
+    return _contadores.setdefault(host, {'ok': 0, 'falhas': 0, 'hedges': 0, 'vitorias_hedge': 0})
+
+def urls_em_ordem(url):
+    """
+    A mesma URL em cada espelho do host, do mais rápido (mediana da latência)
+    para o mais lento. Espelhos ainda sem amostras suficientes vêm depois do host
+    original; eles ganham amostras quando recebem um hedge.
+    """
+    partes = urlparse(url)
+    host = partes.netloc.lower()
+    with _trava:
+        grupo = _grupos.get(host)
+        if not grupo:
+            return [url]
+
+        def chave(espelho):
+            amostras = _latencias.get(espelho)
+            if amostras and len(amostras) >= MINIMO_AMOSTRAS:
+                return (0, _percentil(amostras, 0.5))
+            return (-1, 0) if espelho == host else (1, 0)
+
+        ordem = sorted(grupo, key=chave)
+    return [partes._replace(netloc=espelho).geturl() for espelho in ordem]
+
+def atraso_do_hedge(url):
+    """Quanto esperar pelos cabeçalhos antes de mandar a requisição para outro espelho."""
+    host = urlparse(url).netloc.lower()
+    with _trava:
+        amostras = _latencias.get(host)
+        if not amostras or len(amostras) < MINIMO_AMOSTRAS:
+            return ATRASO_PADRAO
+        return max(ATRASO_MINIMO, _percentil(amostras, 0.95))
+
+def registrar_latencia(url, segundos):
+    host = urlparse(url).netloc.lower()
+    with _trava:
+        if host not in _grupos:
+            return
+        _latencias.setdefault(host, deque(maxlen=AMOSTRAS_POR_HOST)).append(segundos)
+        _contador(host)['ok'] += 1
+
+def registrar_perdedor(url, segundos):
+    """Espelho que perdeu a corrida: o tempo que ele já levava é um piso da latência dele."""
+    host = urlparse(url).netloc.lower()
+    with _trava:
+        if host not in _grupos:
+            return
+        _latencias.setdefault(host, deque(maxlen=AMOSTRAS_POR_HOST)).append(segundos)
+        _contador(host)
+
+def registrar_falha(url):
+    host = urlparse(url).netloc.lower()
+    with _trava:
+        if host not in _grupos:
+            return
+        _latencias.setdefault(host, deque(maxlen=AMOSTRAS_POR_HOST)).append(PENALIDADE_FALHA)
+        _contador(host)['falhas'] += 1
+
+def registrar_hedge(url, venceu=False):
+    """Conta um hedge enviado para o espelho da `url` (e se foi ele quem respondeu primeiro)."""
+    host = urlparse(url).netloc.lower()
+    with _trava:
+        if host not in _grupos:
+            return
+        _contador(host)['vitorias_hedge' if venceu else 'hedges'] += 1
+
+def estado_espelhos():
+    """Latências e contadores de cada espelho já usado."""
+    with _trava:
+        estados = []
+        for host, contador in _contadores.items():
+            amostras = _latencias.get(host) or []
+            estados.append({
+                'host': host,
+                'mediana_ms': round(_percentil(amostras, 0.5) * 1000) if amostras else None,
+                'p95_ms': round(_percentil(amostras, 0.95) * 1000) if amostras else None,
+                **contador,
+            })
+        return estados
+
+def imprimir_estado_espelhos():
+    estados = estado_espelhos()
+    if not estados:
+        return
+    print("Espelhos de CDN:")
+    for estado in estados:
+        mediana = f"{estado['mediana_ms']}ms" if estado['mediana_ms'] is not None else "-"
+        p95 = f"{estado['p95_ms']}ms" if estado['p95_ms'] is not None else "-"
+        print(f"  {estado['host']}: mediana {mediana}, p95 {p95}, {estado['ok']} ok / {estado['falhas']} falhas, "
+              f"{estado['hedges']} hedges enviados ({estado['vitorias_hedge']} venceram)")
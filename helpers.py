@@ -1,57 +1,73 @@
-import re
-import base64
-
-def sanitize_foldername(name):
-    """Remove caracteres inválidos de um nome de arquivo/pasta."""
-    return re.sub(r'[\\/*?:"<>|]', "", name).strip()
-
-def download_image_with_selenium(driver, image_url, save_path):
-    """
-    Usa o Selenium para baixar uma imagem executando um script JavaScript e
-    verifica se o conteúdo retornado é realmente uma imagem antes de salvar.
-    """
-    try:
-        # Script JavaScript que busca a imagem como um blob e a converte para Base64
-        js_script = """
-        var url = arguments[0];
-        var callback = arguments[1];
-        
-        fetch(url)
-            .then(response => response.blob())
-            .then(blob => {
-                var reader = new FileReader();
-                reader.onload = function() {
-                    callback(this.result);
-                };
-                reader.readAsDataURL(blob);
-            })
-            .catch(error => callback(null));
-        """
-        driver.set_script_timeout(30)
-        base64_data = driver.execute_async_script(js_script, image_url)
-        
-        if base64_data is None:
-            # Isso acontecerá se a URL der um erro de rede (como 404 Not Found)
-            return False
-
-        # Decodifica a string Base64 para dados de imagem binários
-        header, encoded = base64_data.split(",", 1)
-        
-        # >>> NOVA VERIFICAÇÃO <<<
-        # Se o cabeçalho não indicar que o conteúdo é uma imagem, retorna falha.
-        # Isso impede que páginas de erro XML (como a que você encontrou) sejam salvas.
-        if not header.startswith('data:image'):
-            #print(f"    -> Conteúdo recebido de {image_url} não é uma imagem. Pulando.")
-            return False
-            
-        image_data = base64.b64decode(encoded)
-        
-        # Salva os dados binários no arquivo
-        with open(save_path, 'wb') as f:
-            f.write(image_data)
-        return True
-        
-    except Exception:
-        # Se qualquer erro ocorrer (ex: a URL não existe e o JS falha),
-        # a função retornará False, contando como uma falha de download.
+import re
+import base64
+
+def sanitize_foldername(name):
+    """Remove caracteres inválidos de um nome de arquivo/pasta."""
+    return re.sub(r'[\\/*?:"<>|]', "", name).strip()
+
+def nome_pasta_capitulo(chapter_number):
+    """Retorna o nome da pasta de um capítulo (ex: 'Capítulo 05' ou 'Capítulo 05.5')."""
+    if chapter_number.is_integer():
+        formatted_number = str(int(chapter_number)).zfill(2)
+    else:
+        s_chapter_number = str(chapter_number)
+        parts = s_chapter_number.split('.')
+        integer_part, fractional_part = parts[0], parts[1]
+        formatted_number = f"{integer_part.zfill(2)}.{fractional_part}"
+    return f"Capítulo {formatted_number}"
+
+def selecionar_capitulos(lista_de_capitulos, inicio, fim):
+    """Capítulos de `inicio` até `fim`, incluindo os fracionados do último (ex: 5.1, 5.2)."""
+    fim_ajustado = fim + 1
+    return [cap for cap in lista_de_capitulos if inicio <= cap['cap_numero'] < fim_ajustado]
+
+def download_image_with_selenium(driver, image_url, save_path):
+    """
+    Usa o Selenium para baixar uma imagem executando um script JavaScript e
+    verifica se o conteúdo retornado é realmente uma imagem antes de salvar.
+    """
+    try:
+        # Script JavaScript que busca a imagem como um blob e a converte para Base64
+        js_script = """
+        var url = arguments[0];
+        var callback = arguments[1];
+        
+        fetch(url)
+            .then(response => response.blob())
+            .then(blob => {
+                var reader = new FileReader();
+                reader.onload = function() {
+                    callback(this.result);
+                };
+                reader.readAsDataURL(blob);
+            })
+            .catch(error => callback(null));
+        """
+        driver.set_script_timeout(30)
+        base64_data = driver.execute_async_script(js_script, image_url)
+        
+        if base64_data is None:
+            # Isso acontecerá se a URL der um erro de rede (como 404 Not Found)
+            return False
+
+        # Decodifica a string Base64 para dados de imagem binários
+        header, encoded = base64_data.split(",", 1)
+        
+        # >>> NOVA VERIFICAÇÃO <<<
+        # Se o cabeçalho não indicar que o conteúdo é uma imagem, retorna falha.
+        # Isso impede que páginas de erro XML (como a que você encontrou) sejam salvas.
+        if not header.startswith('data:image'):
+            #print(f"    -> Conteúdo recebido de {image_url} não é uma imagem. Pulando.")
+            return False
+            
+        image_data = base64.b64decode(encoded)
+        
+        # Salva os dados binários no arquivo
+        with open(save_path, 'wb') as f:
+            f.write(image_data)
+        return True
+        
+    except Exception:
+        # Se qualquer erro ocorrer (ex: a URL não existe e o JS falha),
+        # a função retornará False, contando como uma falha de download.
         return False
\ No newline at end of file
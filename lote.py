@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from datetime import datetime
+
+from driver_setup import DriverPreguicoso
+from sessao_persistente import criar_scraper
+from controle_taxa import estado_hosts
+from espelhos import estado_espelhos
+from helpers import sanitize_foldername, selecionar_capitulos
+from pipeline import processar_capitulos
+from manifesto import Manifesto
+from roteador import identificar_site, obter_dados_da_obra
+
+# ==============================================================================
+# MODO EM LOTE (NÃO INTERATIVO)
+# Lê um arquivo de trabalhos e baixa tudo sem perguntas. Mantém um navegador
+# por site vivo entre as obras desse site (sem reabrir o Chrome nem refazer o
+# Cloudflare/login a cada obra) e termina com um resumo em JSON.
+#
+#   python lote.py trabalhos.json [--resumo resumo.json]
+#
+# Formato do arquivo de trabalhos:
+#   {
+#     "padrao": {"formatos": ["CBZ"], "apagar_pastas": true},
+#     "trabalhos": [
+#       {"url": "https://...", "de": 1, "ate": 10},
+#       {"url": "https://...", "formatos": ["PDF", "CBZ"], "apagar_pastas": false}
+#     ]
+#   }
+# Sem "de"/"ate" a obra é baixada inteira. "formatos" vazio mantém só as pastas.
+# ==============================================================================
+
+FORMATOS_VALIDOS = ('PDF', 'CBZ')
+
+def ler_trabalhos(caminho):
+    """Lê o arquivo de trabalhos e aplica os valores de "padrao" em cada trabalho."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    if isinstance(dados, list):
+        dados = {'trabalhos': dados}
+    padrao = dados.get('padrao', {})
+    trabalhos = []
+    for item in dados.get('trabalhos', []):
+        if isinstance(item, str):
+            item = {'url': item}
+        trabalho = dict(padrao, **item)
+        trabalho['formatos'] = [f.upper() for f in trabalho.get('formatos', [])]
+        invalidos = [f for f in trabalho['formatos'] if f not in FORMATOS_VALIDOS]
+        if invalidos:
+            raise ValueError(f"Formato inválido em {trabalho.get('url')}: {', '.join(invalidos)}")
+        trabalho['apagar_pastas'] = bool(trabalho.get('apagar_pastas')) and bool(trabalho['formatos'])
+        trabalhos.append(trabalho)
+    return trabalhos
+
+def executar_trabalho(trabalho, site, recurso):
+    """Baixa um trabalho e retorna o seu resumo (dict)."""
+    inicio = time.time()
+    resumo = {
+        'url': trabalho['url'],
+        'titulo': None,
+        'pasta': None,
+        'capitulos_pedidos': 0,
+        'capitulos_ja_completos': 0,
+        'imagens_ok': 0,
+        'imagens_falha': 0,
+        'status': 'erro',
+        'erro': None,
+    }
+    try:
+        obra_nome, lista_de_capitulos = obter_dados_da_obra(site, trabalho['url'], recurso)
+        obra_folder_name = sanitize_foldername(obra_nome) if obra_nome else None
+        if not lista_de_capitulos or not obra_folder_name:
+            resumo['erro'] = "Não foi possível obter o título ou a lista de capítulos."
+            return resumo
+        resumo['titulo'] = obra_nome
+        resumo['pasta'] = os.path.abspath(obra_folder_name)
+
+        caps_para_baixar = lista_de_capitulos
+        if trabalho.get('de') is not None or trabalho.get('ate') is not None:
+            de = float(trabalho.get('de', float('-inf')))
+            ate = float(trabalho.get('ate', float('inf')))
+            caps_para_baixar = selecionar_capitulos(lista_de_capitulos, de, ate)
+        caps_para_baixar = sorted(caps_para_baixar, key=lambda x: x['cap_numero'])
+        resumo['capitulos_pedidos'] = len(caps_para_baixar)
+
+        os.makedirs(obra_folder_name, exist_ok=True)
+        manifesto = Manifesto(obra_folder_name)
+        completos = [cap for cap in caps_para_baixar if manifesto.capitulo_completo(cap, trabalho['formatos'])]
+        resumo['capitulos_ja_completos'] = len(completos)
+        caps_para_baixar = [cap for cap in caps_para_baixar if cap not in completos]
+
+        if caps_para_baixar:
+            print(f"\nIniciando download de {len(caps_para_baixar)} capítulos de '{obra_nome}'...")
+            sucessos, falhas = processar_capitulos(
+                caps_para_baixar, site, recurso, obra_folder_name, trabalho['formatos'], trabalho['apagar_pastas'],
+                manifesto=manifesto
+            )
+            resumo['imagens_ok'], resumo['imagens_falha'] = sucessos, falhas
+        resumo['status'] = 'parcial' if resumo['imagens_falha'] else 'ok'
+    except Exception as e:
+        resumo['erro'] = str(e)
+    finally:
+        resumo['segundos'] = round(time.time() - inicio, 1)
+    return resumo
+
+def executar_lote(trabalhos):
+    """
+    Executa os trabalhos na ordem do arquivo. Cada site com navegador tem um único
+    driver, iniciado no primeiro trabalho que precisar dele e fechado depois do
+    último trabalho daquele site. Retorna o resumo do lote (dict).
+    """
+    inicio = datetime.now()
+    scraper = criar_scraper()
+    drivers = {}
+    sites = [identificar_site(trabalho['url']) for trabalho in trabalhos]
+    ultimo_trabalho_do_site = {site['handler']: i for i, site in enumerate(sites) if site is not None}
+
+    resultados = []
+    try:
+        for i, (trabalho, site) in enumerate(zip(trabalhos, sites)):
+            print("=" * 50)
+            print(f"Trabalho {i + 1}/{len(trabalhos)}: {trabalho['url']}")
+            if site is None:
+                print("URL de um site não suportado. Pulando.")
+                resultados.append({'url': trabalho['url'], 'status': 'erro', 'erro': "Site não suportado."})
+                continue
+
+            if site['usa_selenium']:
+                if site['handler'] not in drivers:
+                    drivers[site['handler']] = DriverPreguicoso(run_headless=site['headless'], perfil=site['handler'])
+                recurso = drivers[site['handler']]
+            else:
+                recurso = scraper
+
+            resultados.append(executar_trabalho(trabalho, site, recurso))
+
+            # Último trabalho deste site: o navegador não é mais necessário
+            if i == ultimo_trabalho_do_site[site['handler']] and site['handler'] in drivers:
+                if drivers[site['handler']].iniciado:
+                    print("Fechando o navegador (Selenium)...")
+                drivers.pop(site['handler']).quit()
+    finally:
+        for driver in drivers.values():
+            driver.quit()
+
+    return {
+        'inicio': inicio.isoformat(timespec='seconds'),
+        'fim': datetime.now().isoformat(timespec='seconds'),
+        'totais': {
+            'trabalhos': len(resultados),
+            'ok': sum(1 for r in resultados if r['status'] == 'ok'),
+            'parcial': sum(1 for r in resultados if r['status'] == 'parcial'),
+            'erro': sum(1 for r in resultados if r['status'] == 'erro'),
+            'imagens_ok': sum(r.get('imagens_ok', 0) for r in resultados),
+            'imagens_falha': sum(r.get('imagens_falha', 0) for r in resultados),
+        },
+        'trabalhos': resultados,
+        # O que cada servidor de imagens aguentou (ver controle_taxa.py)
+        'hosts': estado_hosts(),
+        'espelhos': estado_espelhos(),
+    }
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Baixa as obras de um arquivo de trabalhos, sem perguntas.")
+    parser.add_argument('arquivo', help="arquivo JSON com os trabalhos")
+    parser.add_argument('--resumo', help="grava o resumo em JSON neste arquivo (padrão: mostra no terminal)")
+    args = parser.parse_args(argumentos)
+
+    try:
+        trabalhos = ler_trabalhos(args.arquivo)
+    except (OSError, ValueError) as e:
+        print(f"[x] Não foi possível ler o arquivo de trabalhos: {e}")
+        return 2
+    if not trabalhos:
+        print("Nenhum trabalho no arquivo.")
+        return 2
+
+    resumo = executar_lote(trabalhos)
+    texto = json.dumps(resumo, ensure_ascii=False, indent=2)
+    if args.resumo:
+        with open(args.resumo, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        print(f"\n[✔] Resumo gravado em: {args.resumo}")
+    else:
+        print(texto)
+    # Código de saída diferente de zero quando algum trabalho não terminou bem
+    return 0 if resumo['totais']['ok'] == resumo['totais']['trabalhos'] else 1
+
+if __name__ == "__main__":
+    # Necessário para o pool de processos da conversão no executável (PyInstaller/Windows)
+    multiprocessing.freeze_support()
+    sys.exit(main())
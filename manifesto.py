@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+import threading
+
+from helpers import nome_pasta_capitulo
+
+# ==============================================================================
+# MANIFESTO DA OBRA
+# Cada pasta de obra guarda um 'manifesto.json' com o que já foi baixado: para
+# cada capítulo, o id/URL, quantas páginas eram esperadas e o arquivo, tamanho e
+# hash de cada página, além dos arquivos PDF/CBZ gerados. Com ele, rodar de novo
+# um intervalo pula os capítulos completos sem abrir o navegador nem acessar a
+# rede, e os capítulos incompletos só baixam as páginas que faltam.
+# ==============================================================================
+
+ARQUIVO_MANIFESTO = 'manifesto.json'
+VERSAO_MANIFESTO = 1
+
+def hash_do_arquivo(caminho):
+    """Calcula o SHA-256 de um arquivo local, lendo em blocos."""
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+class Manifesto:
+    """Manifesto de uma obra. Pode ser usado pelas várias etapas do pipeline ao mesmo tempo."""
+
+    def __init__(self, pasta_obra):
+        self.pasta_obra = pasta_obra
+        self.caminho = os.path.join(pasta_obra, ARQUIVO_MANIFESTO)
+        self._trava = threading.RLock()
+        self.dados = {'versao': VERSAO_MANIFESTO, 'capitulos': {}}
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+                if dados.get('versao') == VERSAO_MANIFESTO:
+                    self.dados = dados
+            except (OSError, ValueError) as e:
+                print(f"  [!] Manifesto da obra ilegível, começando um novo: {e}")
+
+    def salvar(self):
+        """Grava o manifesto em um arquivo temporário e troca de uma vez (nunca fica pela metade)."""
+        with self._trava:
+            os.makedirs(self.pasta_obra, exist_ok=True)
+            temporario = self.caminho + '.part'
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self.dados, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+
+    def _capitulo(self, cap_numero):
+        return self.dados['capitulos'].get(nome_pasta_capitulo(cap_numero))
+
+    def registrar_capitulo(self, cap_info, paginas_esperadas):
+        """Cria (ou atualiza) a entrada do capítulo antes do download das páginas."""
+        with self._trava:
+            chave = nome_pasta_capitulo(cap_info['cap_numero'])
+            capitulo = self.dados['capitulos'].setdefault(chave, {'paginas': {}, 'saidas': [], 'completo': False})
+            capitulo['numero'] = cap_info['cap_numero']
+            capitulo['id'] = cap_info.get('cap_id')
+            capitulo['url'] = cap_info.get('cap_url')
+            capitulo['paginas_esperadas'] = paginas_esperadas
+            return capitulo
+
+    def registrar_pagina(self, cap_numero, nome_arquivo, tamanho, sha256):
+        with self._trava:
+            capitulo = self._capitulo(cap_numero)
+            if capitulo is not None:
+                capitulo['paginas'][nome_arquivo] = {'tamanho': tamanho, 'sha256': sha256}
+
+    def registrar_pasta(self, cap_numero, pasta_capitulo):
+        """
+        Registra as páginas que estão na pasta do capítulo e ainda não constam no
+        manifesto (ex: capturadas do navegador ou baixadas pelo próprio handler).
+        """
+        if not os.path.isdir(pasta_capitulo):
+            return
+        with self._trava:
+            capitulo = self._capitulo(cap_numero)
+            if capitulo is None:
+                return
+            for nome_arquivo in os.listdir(pasta_capitulo):
+                if nome_arquivo.endswith('.part'):
+                    continue
+                caminho = os.path.join(pasta_capitulo, nome_arquivo)
+                registro = capitulo['paginas'].get(nome_arquivo)
+                if registro is None or registro['tamanho'] != os.path.getsize(caminho):
+                    capitulo['paginas'][nome_arquivo] = {
+                        'tamanho': os.path.getsize(caminho),
+                        'sha256': hash_do_arquivo(caminho),
+                    }
+
+    def concluir_capitulo(self, cap_numero, falhas):
+        """Marca o capítulo como completo quando todas as páginas esperadas foram baixadas."""
+        with self._trava:
+            capitulo = self._capitulo(cap_numero)
+            if capitulo is None:
+                return False
+            capitulo['completo'] = falhas == 0 and len(capitulo['paginas']) >= capitulo['paginas_esperadas'] > 0
+            return capitulo['completo']
+
+    def registrar_saida(self, cap_numero, nome_arquivo):
+        """Registra um PDF/CBZ gerado a partir do capítulo completo."""
+        with self._trava:
+            capitulo = self._capitulo(cap_numero)
+            if capitulo is not None and capitulo['completo'] and nome_arquivo not in capitulo['saidas']:
+                capitulo['saidas'].append(nome_arquivo)
+
+    def esta_incompleto(self, cap_numero):
+        """True se o capítulo já foi processado antes mas ficou faltando páginas."""
+        capitulo = self._capitulo(cap_numero)
+        return capitulo is not None and not capitulo['completo']
+
+    def paginas_registradas(self, cap_numero):
+        capitulo = self._capitulo(cap_numero)
+        return len(capitulo['paginas']) if capitulo is not None else 0
+
+    def pagina_valida(self, cap_numero, caminho):
+        """Confere se a página já está no disco com o mesmo tamanho e hash do manifesto."""
+        capitulo = self._capitulo(cap_numero)
+        if capitulo is None or not os.path.exists(caminho):
+            return False
+        registro = capitulo['paginas'].get(os.path.basename(caminho))
+        if registro is None or registro['tamanho'] != os.path.getsize(caminho):
+            return False
+        return registro['sha256'] == hash_do_arquivo(caminho)
+
+    def capitulo_completo(self, cap_info, formatos_desejados):
+        """
+        Diz, sem acessar a rede, se o capítulo já está pronto: completo no manifesto
+        e com os arquivos pedidos no disco (PDF/CBZ ou, sem formato, as imagens na pasta).
+        """
+        capitulo = self._capitulo(cap_info['cap_numero'])
+        if capitulo is None or not capitulo['completo']:
+            return False
+        chapter_folder_name = nome_pasta_capitulo(cap_info['cap_numero'])
+        if formatos_desejados:
+            for formato in formatos_desejados:
+                nome_arquivo = f"{chapter_folder_name}.{formato.lower()}"
+                if nome_arquivo not in capitulo['saidas'] or not os.path.exists(os.path.join(self.pasta_obra, nome_arquivo)):
+                    return False
+            return True
+        # Só a pasta de imagens: confere tamanho de cada página (sem reler os arquivos)
+        pasta_capitulo = os.path.join(self.pasta_obra, chapter_folder_name)
+        for nome_arquivo, registro in capitulo['paginas'].items():
+            caminho = os.path.join(pasta_capitulo, nome_arquivo)
+            if not os.path.exists(caminho) or os.path.getsize(caminho) != registro['tamanho']:
+                return False
+        return True
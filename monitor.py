@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (ARQUIVO_BIBLIOTECA, INTERVALO_MONITOR_API, INTERVALO_MONITOR_NAVEGADOR,
+                    MONITOR_CONCORRENCIA_API)
+from driver_setup import DriverPreguicoso
+from sessao_persistente import criar_scraper
+from helpers import sanitize_foldername
+from pipeline import processar_capitulos
+from manifesto import Manifesto
+from roteador import identificar_site, obter_dados_da_obra
+
+# ==============================================================================
+# MODO DE ACOMPANHAMENTO (BIBLIOTECA)
+# Mantém uma lista de obras seguidas com o último capítulo visto de cada uma.
+# Periodicamente busca a lista de capítulos de cada obra, compara com o que está
+# guardado e manda só os capítulos novos para o pipeline de sempre. Sites de API
+# são baratos e verificados com mais frequência que os que precisam do navegador.
+#
+#   python monitor.py adicionar <url> [--formatos PDF,CBZ] [--apagar-pastas] [--desde N]
+#   python monitor.py remover <url>
+#   python monitor.py listar
+#   python monitor.py rodar [--uma-vez]
+# ==============================================================================
+
+INTERVALO_VERIFICACAO_FILA = 30
+
+class Biblioteca:
+    """Arquivo JSON com as obras seguidas. Seguro para uso por várias threads."""
+
+    def __init__(self, caminho=ARQUIVO_BIBLIOTECA):
+        self.caminho = caminho
+        self._trava = threading.RLock()
+        self.obras = {}
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                self.obras = json.load(f).get('obras', {})
+
+    def salvar(self):
+        with self._trava:
+            temporario = self.caminho + '.part'
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump({'obras': self.obras}, f, ensure_ascii=False, indent=2)
+            os.replace(temporario, self.caminho)
+
+    def atualizar(self, obra_url, **campos):
+        with self._trava:
+            self.obras[obra_url].update(campos)
+            self.salvar()
+
+def _intervalo_da_obra(site):
+    return INTERVALO_MONITOR_NAVEGADOR if site['usa_selenium'] else INTERVALO_MONITOR_API
+
+def _capitulos_novos(obra, lista_de_capitulos):
+    """Compara a lista atual com o último capítulo visto e retorna só os novos, em ordem."""
+    if obra.get('ultimo_capitulo') is not None:
+        novos = [cap for cap in lista_de_capitulos if cap['cap_numero'] > obra['ultimo_capitulo']]
+    elif obra.get('desde') is not None:
+        novos = [cap for cap in lista_de_capitulos if cap['cap_numero'] >= obra['desde']]
+    else:
+        return []
+    return sorted(novos, key=lambda cap: cap['cap_numero'])
+
+class Monitor:
+    """
+    Verifica as obras da biblioteca. Cada site tem seu próprio recurso (navegador
+    ou scraper) e seu próprio pool de threads, que é o limite de concorrência dele:
+    obras de um site lento não ocupam a vez das obras de outro.
+    """
+
+    def __init__(self, biblioteca):
+        self.biblioteca = biblioteca
+        self._recursos = {}
+        self._executores = {}
+        self._trava = threading.Lock()
+
+    def _recurso(self, site):
+        with self._trava:
+            handler = site['handler']
+            if handler not in self._recursos:
+                if site['usa_selenium']:
+                    self._recursos[handler] = DriverPreguicoso(run_headless=site['headless'], perfil=site['handler'])
+                else:
+                    self._recursos[handler] = criar_scraper()
+            return self._recursos[handler]
+
+    def _executor(self, site):
+        with self._trava:
+            handler = site['handler']
+            if handler not in self._executores:
+                # Um navegador por site, usado por uma obra de cada vez
+                limite = 1 if site['usa_selenium'] else MONITOR_CONCORRENCIA_API
+                self._executores[handler] = ThreadPoolExecutor(max_workers=limite)
+            return self._executores[handler]
+
+    def verificar_obra(self, obra_url):
+        """Busca a lista de capítulos da obra e processa os capítulos novos."""
+        obra = self.biblioteca.obras[obra_url]
+        site = identificar_site(obra_url)
+        if site is None:
+            print(f"[x] Site não suportado, ignorando: {obra_url}")
+            return
+        recurso = self._recurso(site)
+        # Sempre busca a lista no site: o objetivo é justamente achar capítulos novos
+        obra_nome, lista_de_capitulos = obter_dados_da_obra(site, obra_url, recurso, usar_cache=False)
+
+        if not obra_nome or not lista_de_capitulos:
+            print(f"[!] Não foi possível obter a lista de capítulos de: {obra_url}")
+            self.biblioteca.atualizar(obra_url, verificado_em=time.time())
+            return
+
+        maior_capitulo = max(cap['cap_numero'] for cap in lista_de_capitulos)
+        if obra.get('ultimo_capitulo') is None and obra.get('desde') is None:
+            # Primeira verificação: só marca o ponto de partida
+            print(f"[✔] '{obra_nome}': seguindo a partir do capítulo {maior_capitulo:g}.")
+            self.biblioteca.atualizar(obra_url, titulo=obra_nome, ultimo_capitulo=maior_capitulo,
+                                      verificado_em=time.time())
+            return
+
+        novos = _capitulos_novos(obra, lista_de_capitulos)
+        if not novos:
+            print(f"[⏩] '{obra_nome}': nenhum capítulo novo.")
+            self.biblioteca.atualizar(obra_url, titulo=obra_nome, verificado_em=time.time())
+            return
+
+        print(f"[→] '{obra_nome}': {len(novos)} capítulo(s) novo(s).")
+        obra_folder_name = sanitize_foldername(obra_nome)
+        os.makedirs(obra_folder_name, exist_ok=True)
+        manifesto = Manifesto(obra_folder_name)
+        processar_capitulos(novos, site, recurso, obra_folder_name, obra['formatos'],
+                            obra['apagar_pastas'], manifesto=manifesto)
+
+        # Avança o último capítulo visto só até o primeiro que não ficou completo,
+        # para que ele seja tentado de novo na próxima verificação
+        ultimo = obra.get('ultimo_capitulo')
+        for cap in novos:
+            if not manifesto.capitulo_completo(cap, obra['formatos']):
+                break
+            ultimo = cap['cap_numero']
+        desde = obra.get('desde') if ultimo is None else None
+        self.biblioteca.atualizar(obra_url, titulo=obra_nome, ultimo_capitulo=ultimo, desde=desde,
+                                  verificado_em=time.time())
+
+    def _verificar_com_seguranca(self, obra_url):
+        try:
+            self.verificar_obra(obra_url)
+        except Exception as e:
+            print(f"[x] Erro ao verificar {obra_url}: {e}")
+            self.biblioteca.atualizar(obra_url, verificado_em=time.time())
+
+    def obras_pendentes(self, agora):
+        """Obras cujo intervalo de verificação já passou."""
+        pendentes = []
+        for obra_url, obra in list(self.biblioteca.obras.items()):
+            site = identificar_site(obra_url)
+            if site is not None and agora - obra.get('verificado_em', 0) >= _intervalo_da_obra(site):
+                pendentes.append(obra_url)
+        return pendentes
+
+    def rodar(self, uma_vez=False):
+        """Verifica as obras no horário de cada uma, até Ctrl+C (ou uma única rodada)."""
+        em_andamento = set()
+        trava = threading.Lock()
+
+        def verificar(obra_url):
+            try:
+                self._verificar_com_seguranca(obra_url)
+            finally:
+                with trava:
+                    em_andamento.discard(obra_url)
+
+        try:
+            while True:
+                pendentes = list(self.biblioteca.obras) if uma_vez else self.obras_pendentes(time.time())
+                for obra_url in pendentes:
+                    with trava:
+                        if obra_url in em_andamento:
+                            continue
+                        em_andamento.add(obra_url)
+                    self._executor(identificar_site(obra_url)).submit(verificar, obra_url)
+                if uma_vez:
+                    break
+                time.sleep(INTERVALO_VERIFICACAO_FILA)
+        except KeyboardInterrupt:
+            print("\nEncerrando o acompanhamento depois das verificações em andamento...")
+            for executor in self._executores.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+        self.fechar()
+
+    def fechar(self):
+        """Espera as verificações em andamento e fecha os navegadores."""
+        for executor in self._executores.values():
+            executor.shutdown(wait=True)
+        for recurso in self._recursos.values():
+            if isinstance(recurso, DriverPreguicoso):
+                recurso.quit()
+
+def _formatos(texto):
+    formatos = [f.strip().upper() for f in texto.split(',') if f.strip()]
+    invalidos = [f for f in formatos if f not in ('PDF', 'CBZ')]
+    if invalidos:
+        raise argparse.ArgumentTypeError(f"formato inválido: {', '.join(invalidos)} (use PDF e/ou CBZ)")
+    return formatos
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Acompanha obras e baixa os capítulos novos.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    adicionar = comandos.add_parser('adicionar', help="segue uma obra")
+    adicionar.add_argument('url')
+    adicionar.add_argument('--formatos', type=_formatos, default=[],
+                           help="PDF, CBZ ou PDF,CBZ (padrão: só as pastas de imagens)")
+    adicionar.add_argument('--apagar-pastas', action='store_true',
+                           help="apaga as pastas de imagens depois da conversão")
+    adicionar.add_argument('--desde', type=float, default=None,
+                           help="baixa a partir deste capítulo (padrão: só os que saírem daqui em diante)")
+
+    remover = comandos.add_parser('remover', help="deixa de seguir uma obra")
+    remover.add_argument('url')
+
+    comandos.add_parser('listar', help="mostra as obras seguidas")
+
+    rodar = comandos.add_parser('rodar', help="verifica as obras periodicamente")
+    rodar.add_argument('--uma-vez', action='store_true', help="verifica todas as obras uma vez e sai")
+
+    args = parser.parse_args(argumentos)
+    biblioteca = Biblioteca()
+
+    if args.comando == 'adicionar':
+        if identificar_site(args.url) is None:
+            print("URL de um site não suportado.")
+            return 1
+        biblioteca.obras[args.url] = {
+            'titulo': biblioteca.obras.get(args.url, {}).get('titulo'),
+            'formatos': args.formatos,
+            'apagar_pastas': args.apagar_pastas and bool(args.formatos),
+            'ultimo_capitulo': None,
+            'desde': args.desde,
+            'verificado_em': 0,
+        }
+        biblioteca.salvar()
+        print(f"[✔] Obra adicionada: {args.url}")
+    elif args.comando == 'remover':
+        if biblioteca.obras.pop(args.url, None) is None:
+            print("Essa obra não está na biblioteca.")
+            return 1
+        biblioteca.salvar()
+        print(f"[🗑️] Obra removida: {args.url}")
+    elif args.comando == 'listar':
+        if not biblioteca.obras:
+            print("Nenhuma obra seguida.")
+        for obra_url, obra in biblioteca.obras.items():
+            ultimo = obra.get('ultimo_capitulo')
+            ultimo = f"{ultimo:g}" if ultimo is not None else "-"
+            formatos = ', '.join(obra['formatos']) or 'pastas'
+            print(f"  {obra.get('titulo') or '(ainda não verificada)'} | último: {ultimo} | {formatos} | {obra_url}")
+    elif args.comando == 'rodar':
+        if not biblioteca.obras:
+            print("Nenhuma obra seguida. Use 'python monitor.py adicionar <url>'.")
+            return 1
+        Monitor(biblioteca).rodar(uma_vez=args.uma_vez)
+    return 0
+
+if __name__ == "__main__":
+    # Necessário para o pool de processos da conversão no executável (PyInstaller/Windows)
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import atexit
+import threading
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+from config import PASTA_CACHE
+
+# ==============================================================================
+# PERFIS PERSISTENTES DO CHROME
+# Cada site pode ter uma pasta de perfil própria (user-data-dir), reaproveitada
+# entre execuções. Como dois Chrome abertos no mesmo perfil o corrompem, cada
+# perfil tem um arquivo de trava com uma trava exclusiva do sistema operacional
+# (flock / msvcrt.locking), mantida enquanto o processo usa o perfil. Se o
+# processo morrer sem liberar, o próprio sistema solta a trava: não há trava
+# abandonada para tomar, e dois processos nunca ficam com o mesmo perfil.
+# ==============================================================================
+
+PASTA_PERFIS = os.path.join(PASTA_CACHE, 'perfis')
+
+# Caminho da trava -> descritor aberto que segura a trava
+_travas_deste_processo = {}
+_trava = threading.Lock()
+
+def _travar_arquivo(descritor):
+    """Tenta a trava exclusiva do arquivo, sem esperar. Retorna True se conseguiu."""
+    try:
+        if os.name == 'nt':
+            os.lseek(descritor, 0, os.SEEK_SET)
+            msvcrt.locking(descritor, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(descritor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+def _destravar_arquivo(descritor):
+    try:
+        if os.name == 'nt':
+            os.lseek(descritor, 0, os.SEEK_SET)
+            msvcrt.locking(descritor, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(descritor, fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+def reservar_perfil(nome):
+    """
+    Reserva a pasta de perfil do site `nome` para este processo. Retorna o caminho
+    da pasta, ou None se o perfil está em uso (por outro processo ou por outro
+    navegador deste mesmo processo); nesse caso use um perfil temporário.
+    """
+    pasta = os.path.join(PASTA_PERFIS, nome)
+    caminho_trava = pasta + '.lock'
+    os.makedirs(PASTA_PERFIS, exist_ok=True)
+    with _trava:
+        if caminho_trava in _travas_deste_processo:
+            return None
+        try:
+            descritor = os.open(caminho_trava, os.O_CREAT | os.O_RDWR)
+        except OSError:
+            return None
+        if not _travar_arquivo(descritor):
+            os.close(descritor)
+            return None
+        # O PID no arquivo é só informativo (quem está usando o perfil)
+        try:
+            os.ftruncate(descritor, 0)
+            os.lseek(descritor, 0, os.SEEK_SET)
+            os.write(descritor, str(os.getpid()).encode())
+        except OSError:
+            pass
+        _travas_deste_processo[caminho_trava] = descritor
+        return pasta
+
+def liberar_perfil(pasta):
+    """Libera a trava de um perfil reservado por este processo."""
+    caminho_trava = pasta + '.lock'
+    with _trava:
+        descritor = _travas_deste_processo.pop(caminho_trava, None)
+        if descritor is None:
+            return
+        # O arquivo fica: apagá-lo deixaria outro processo travando um arquivo que já não existe
+        _destravar_arquivo(descritor)
+        os.close(descritor)
+
+@atexit.register
+def _liberar_todos():
+    for caminho_trava in list(_travas_deste_processo):
+        liberar_perfil(caminho_trava[:-len('.lock')])
@@ -0,0 +1,307 @@
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import PROFUNDIDADE_PIPELINE, PROCESSOS_CONVERSAO, TAMANHO_POOL_DRIVERS
+from conversor import converter_capitulo, EscritorCBZ
+from downloader import baixar_capitulo_preparado, pode_gravar_direto
+from helpers import nome_pasta_capitulo
+from manifesto import Manifesto
+from driver_setup import DriverPreguicoso
+from pool_drivers import PoolDeDrivers, driver_vivo
+
+# ==============================================================================
+# PIPELINE DE CAPÍTULOS
+# navegador (encontra as páginas) -> download (HTTP) -> conversão (PDF/CBZ)
+# As etapas rodam ao mesmo tempo, ligadas por filas limitadas: quando uma fila
+# enche, a etapa anterior espera (back-pressure), então a memória fica limitada
+# e o tempo total tende ao da etapa mais lenta em vez da soma de todas.
+# ==============================================================================
+
+_FIM = object()
+
+# Pool de processos da conversão, criado na primeira vez e reaproveitado entre obras
+_pool_conversao = None
+
+def _obter_pool_conversao():
+    global _pool_conversao
+    if _pool_conversao is None:
+        _pool_conversao = ProcessPoolExecutor(max_workers=PROCESSOS_CONVERSAO)
+    return _pool_conversao
+
+def _finalizar_conversao(futuro, chapter_path, chapter_folder_name, delete_original_folders):
+    """Recebe o resultado de uma conversão e só então apaga a pasta original. Retorna se deu certo."""
+    try:
+        conversao_ok = futuro.result()
+    except Exception as e:
+        print(f"  [x] Erro ao converter {chapter_folder_name}: {e}")
+        return False
+    if conversao_ok and delete_original_folders:
+        _remover_pasta_original(chapter_path, chapter_folder_name)
+    return conversao_ok
+
+def _remover_saidas_antigas(obra_folder_name, chapter_folder_name, formatos_desejados):
+    """Apaga PDF/CBZ gerados quando o capítulo estava incompleto, para serem refeitos."""
+    for formato in formatos_desejados:
+        caminho = os.path.join(obra_folder_name, f"{chapter_folder_name}.{formato.lower()}")
+        if os.path.exists(caminho):
+            print(f"  [!] Refazendo {os.path.basename(caminho)}: o capítulo estava incompleto.")
+            os.remove(caminho)
+
+def _remover_pasta_original(chapter_path, chapter_folder_name):
+    """Apaga a pasta de imagens já convertida. Se não der (ex: arquivo em uso no Windows), só avisa."""
+    print(f"  [🗑️] Removendo pasta de imagens original: {chapter_folder_name}")
+    try:
+        shutil.rmtree(chapter_path)
+    except OSError as e:
+        print(f"  [!] Não foi possível remover a pasta {chapter_folder_name}: {e}")
+
+def _baixar_direto_para_cbz(cap_info, preparo, caminho_cbz, manifesto, substituir=False):
+    """
+    Modo CBZ direto: grava as páginas no CBZ enquanto são baixadas, sem passar
+    pela pasta do capítulo. `substituir` refaz um CBZ de um capítulo incompleto.
+    Retorna (sucessos, falhas) como os handlers.
+    """
+    nome_cbz = os.path.basename(caminho_cbz)
+    if os.path.exists(caminho_cbz) and not substituir:
+        print(f"  [⏩] CBZ já existe, pulando: {nome_cbz}")
+        return 0, 0
+    manifesto.registrar_capitulo(cap_info, preparo['total'])
+    escritor = EscritorCBZ(caminho_cbz)
+    try:
+        sucessos, falhas = baixar_capitulo_preparado(preparo, escritor=escritor, manifesto=manifesto)
+    except Exception:
+        escritor.descartar()
+        raise
+    if sucessos > 0:
+        escritor.concluir()
+        print(f"  [✔] CBZ criado com sucesso: {nome_cbz}")
+    else:
+        escritor.descartar()
+    return sucessos, falhas
+
+def processar_capitulos(caps_para_baixar, site, recurso, obra_folder_name, formatos_desejados, delete_original_folders,
+                        manifesto=None):
+    """
+    Baixa e converte os capítulos de uma obra. `recurso` é o driver do Selenium
+    (pode ser um DriverPreguicoso, iniciado só no primeiro capítulo que precisar
+    dele) ou o scraper, conforme o site. Capítulos que o manifesto da obra já dá como
+    completos são pulados sem acessar a rede. Retorna (total_sucessos, total_falhas).
+    """
+    if manifesto is None:
+        manifesto = Manifesto(obra_folder_name)
+    # Só CBZ e sem manter as pastas: as páginas vão direto do download para o CBZ
+    cbz_direto = list(formatos_desejados) == ['CBZ'] and delete_original_folders
+    fila_download = queue.Queue(maxsize=PROFUNDIDADE_PIPELINE)
+    fila_conversao = queue.Queue(maxsize=PROFUNDIDADE_PIPELINE)
+    totais = {'sucessos': 0, 'falhas': 0}
+
+    def baixar_item(cap_info, preparo, resultado):
+        """Baixa um capítulo e atualiza o manifesto. Retorna o item para a conversão."""
+        cap_numero = cap_info['cap_numero']
+        chapter_folder_name = nome_pasta_capitulo(cap_numero)
+        refazer = manifesto.esta_incompleto(cap_numero)
+        convertido = False
+        baixado_pelo_handler = resultado is not None
+        if resultado is None:
+            try:
+                if cbz_direto and pode_gravar_direto(preparo):
+                    caminho_cbz = os.path.join(obra_folder_name, f"{chapter_folder_name}.cbz")
+                    resultado = _baixar_direto_para_cbz(cap_info, preparo, caminho_cbz, manifesto, substituir=refazer)
+                    convertido = True
+                else:
+                    if preparo is not None:
+                        manifesto.registrar_capitulo(cap_info, preparo['total'])
+                    resultado = baixar_capitulo_preparado(preparo, manifesto=manifesto)
+            except Exception as e:
+                print(f"  Ocorreu um erro ao baixar o capítulo {cap_numero}: {e}")
+                resultado = (0, 1)
+
+        try:
+            if baixado_pelo_handler and resultado[0] > 0:
+                # Handler que baixa sozinho: só agora se sabe quantas páginas o capítulo tem
+                manifesto.registrar_capitulo(cap_info, sum(resultado))
+            if not convertido:
+                # Páginas que não passaram pelo motor (capturadas, adivinhadas...)
+                manifesto.registrar_pasta(cap_numero, os.path.join(obra_folder_name, chapter_folder_name))
+            if manifesto.concluir_capitulo(cap_numero, resultado[1]) and convertido and os.path.exists(caminho_cbz):
+                manifesto.registrar_saida(cap_numero, os.path.basename(caminho_cbz))
+            manifesto.salvar()
+        except Exception as e:
+            print(f"  [!] Não foi possível atualizar o manifesto da obra: {e}")
+        return cap_info, resultado, convertido, refazer
+
+    def etapa_download():
+        while True:
+            item = fila_download.get()
+            if item is _FIM:
+                fila_conversao.put(_FIM)
+                break
+            try:
+                saida = baixar_item(*item)
+            except Exception as e:
+                # Um erro aqui não pode matar a etapa: o resto da fila ficaria esperando para sempre
+                print(f"  [x] Erro inesperado no capítulo {item[0]['cap_numero']}: {e}")
+                saida = (item[0], (0, 1), False, False)
+            fila_conversao.put(saida)
+
+    def etapa_conversao():
+        # A conversão usa CPU, então vai para um pool de processos; esta thread só
+        # envia os trabalhos e recolhe os resultados
+        pendentes = {}
+
+        def registrar_saidas(cap_numero, chapter_folder_name):
+            for formato in formatos_desejados:
+                manifesto.registrar_saida(cap_numero, f"{chapter_folder_name}.{formato.lower()}")
+            try:
+                manifesto.salvar()
+            except Exception as e:
+                print(f"  [!] Não foi possível atualizar o manifesto da obra: {e}")
+
+        def recolher(concluidos):
+            for futuro in concluidos:
+                cap_numero, chapter_path, chapter_folder_name = pendentes.pop(futuro)
+                try:
+                    if _finalizar_conversao(futuro, chapter_path, chapter_folder_name, delete_original_folders):
+                        registrar_saidas(cap_numero, chapter_folder_name)
+                except Exception as e:
+                    print(f"  [x] Erro ao finalizar a conversão de {chapter_folder_name}: {e}")
+                    totais['falhas'] += 1
+
+        def converter_item(cap_info, sucessos, convertido, refazer):
+            chapter_folder_name = nome_pasta_capitulo(cap_info['cap_numero'])
+            chapter_path = os.path.join(obra_folder_name, chapter_folder_name)
+
+            if convertido:
+                # O CBZ já foi gravado no download; sobra só a pasta vazia do capítulo
+                if os.path.isdir(chapter_path):
+                    shutil.rmtree(chapter_path, ignore_errors=True)
+            elif sucessos > 0 and formatos_desejados:
+                if refazer:
+                    _remover_saidas_antigas(obra_folder_name, chapter_folder_name, formatos_desejados)
+                # Limita os trabalhos em espera para não acumular pastas sem fim
+                if len(pendentes) >= PROCESSOS_CONVERSAO * 2:
+                    concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                    recolher(concluidos)
+                try:
+                    futuro = _obter_pool_conversao().submit(
+                        converter_capitulo, chapter_path, obra_folder_name, chapter_folder_name, formatos_desejados
+                    )
+                except Exception as e:
+                    # Sem pool de processos disponível: converte nesta mesma thread
+                    print(f"  [!] Pool de conversão indisponível ({e}). Convertendo sem paralelismo.")
+                    ok = converter_capitulo(chapter_path, obra_folder_name, chapter_folder_name, formatos_desejados)
+                    if ok:
+                        registrar_saidas(cap_info['cap_numero'], chapter_folder_name)
+                        if delete_original_folders:
+                            _remover_pasta_original(chapter_path, chapter_folder_name)
+                    return
+                pendentes[futuro] = (cap_info['cap_numero'], chapter_path, chapter_folder_name)
+
+        while True:
+            item = fila_conversao.get()
+            if item is _FIM:
+                break
+            cap_info, (sucessos, falhas), convertido, refazer = item
+            totais['sucessos'] += sucessos
+            totais['falhas'] += falhas
+            try:
+                converter_item(cap_info, sucessos, convertido, refazer)
+            except Exception as e:
+                # Um erro aqui não pode matar a etapa: a fila encheria e o download travaria
+                print(f"  [x] Erro ao finalizar o capítulo {cap_info['cap_numero']}: {e}")
+                totais['falhas'] += 1
+
+            recolher([futuro for futuro in pendentes if futuro.done()])
+
+        # Espera as conversões que ainda estão rodando
+        concluidos, _ = wait(pendentes)
+        recolher(concluidos)
+
+    workers = [
+        threading.Thread(target=etapa_download, daemon=True),
+        threading.Thread(target=etapa_conversao, daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+
+    total_a_baixar = len(caps_para_baixar)
+
+    def etapa_navegador(cap_info, recurso_do_site):
+        """Encontra as páginas de um capítulo (ou o baixa, nos handlers sem preparo)."""
+        chapter_number = cap_info['cap_numero']
+        try:
+            if site['preparar_capitulo']:
+                # Só encontra as páginas; o download segue na próxima etapa
+                preparo = site['preparar_capitulo'](cap_info, recurso_do_site, obra_folder_name)
+                fila_download.put((cap_info, preparo, None))
+            else:
+                resultado = site['baixar_capitulo'](cap_info, recurso_do_site, obra_folder_name)
+                fila_download.put((cap_info, None, resultado))
+        except Exception as e:
+            print(f"  Ocorreu um erro geral ao processar o capítulo {chapter_number}: {e}")
+            fila_download.put((cap_info, None, (0, 1)))
+
+    def capitulo_precisa_do_site(i, cap_info):
+        """Mostra o progresso e resolve pelo manifesto o que não precisa do site."""
+        print("-" * 40)
+        chapter_number = cap_info['cap_numero']
+        display_number = int(chapter_number) if chapter_number.is_integer() else chapter_number
+        print(f"Processando {i + 1}/{total_a_baixar}: Capítulo {display_number}")
+
+        if manifesto.capitulo_completo(cap_info, formatos_desejados):
+            print("  [⏩] Capítulo já está completo (manifesto da obra), pulando.")
+            return False
+        if formatos_desejados and manifesto.capitulo_completo(cap_info, []):
+            # As imagens já estão todas na pasta: só falta converter
+            print("  [⏩] Imagens já baixadas (manifesto da obra), indo direto para a conversão.")
+            fila_download.put((cap_info, None, (manifesto.paginas_registradas(chapter_number), 0)))
+            return False
+        return True
+
+    def com_navegador_do_pool(pool, i, cap_info):
+        if not capitulo_precisa_do_site(i, cap_info):
+            return
+        driver = pool.emprestar()
+        if driver is None:
+            print("  [x] Não foi possível iniciar o navegador para este capítulo.")
+            fila_download.put((cap_info, None, (0, 1)))
+            return
+        try:
+            etapa_navegador(cap_info, driver)
+        finally:
+            pool.devolver(driver)
+
+    try:
+        if isinstance(recurso, DriverPreguicoso) and TAMANHO_POOL_DRIVERS > 1 and total_a_baixar > 1:
+            # Vários navegadores: cada capítulo pega um emprestado do pool da obra
+            if recurso.pool is None:
+                recurso.pool = PoolDeDrivers(recurso, TAMANHO_POOL_DRIVERS)
+            pool = recurso.pool
+            with ThreadPoolExecutor(max_workers=pool.tamanho) as executor:
+                list(executor.map(lambda args: com_navegador_do_pool(pool, *args), enumerate(caps_para_baixar)))
+        else:
+            # Etapa do navegador: roda na thread atual, que é a dona do driver
+            for i, cap_info in enumerate(caps_para_baixar):
+                if not capitulo_precisa_do_site(i, cap_info):
+                    continue
+                if isinstance(recurso, DriverPreguicoso):
+                    recurso_do_site = recurso.obter()
+                    if recurso_do_site is None:
+                        print("  [x] Não foi possível iniciar o navegador para este capítulo.")
+                        fila_download.put((cap_info, None, (0, 1)))
+                        continue
+                else:
+                    recurso_do_site = recurso
+                etapa_navegador(cap_info, recurso_do_site)
+                if isinstance(recurso, DriverPreguicoso) and not driver_vivo(recurso_do_site):
+                    print("  [!] O navegador parou de responder. Ele será reaberto no próximo capítulo.")
+                    recurso.descartar()
+    finally:
+        fila_download.put(_FIM)
+        for worker in workers:
+            worker.join()
+
+    return totais['sucessos'], totais['falhas']
@@ -0,0 +1,159 @@
+import threading
+
+from config import TAMANHO_POOL_DRIVERS
+from driver_setup import setup_selenium_driver, fechar_driver
+
+# ==============================================================================
+# POOL DE NAVEGADORES
+# Abrir um capítulo no navegador é quase só espera (carregamento da página), não
+# CPU. Com vários navegadores, vários capítulos da mesma obra carregam ao mesmo
+# tempo. Cada navegador é uma instância separada do Chrome: um WebDriver executa
+# um comando por vez e só enxerga a aba atual, então abas de um mesmo navegador
+# não carregariam capítulos em paralelo com os handlers atuais.
+# ==============================================================================
+
+# Campos aceitos pelo Network.setCookies (o Network.getAllCookies retorna outros também)
+_CAMPOS_COOKIE = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+def driver_vivo(driver):
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+class PoolDeDrivers:
+    """
+    Empresta navegadores para os capítulos. O primeiro é o DriverPreguicoso da obra
+    (o mesmo que buscou a lista de capítulos); os outros são abertos sob demanda até
+    `tamanho`. Navegadores que travam são descartados e reabertos, e os cookies (login,
+    Cloudflare) de quem devolve um navegador passam para os outros.
+    """
+
+    def __init__(self, principal, tamanho=TAMANHO_POOL_DRIVERS):
+        self.principal = principal
+        self.tamanho = max(1, tamanho)
+        self._livres = []
+        self._trava = threading.Lock()
+        # Avisada sempre que um navegador volta ou uma vaga abre (um travado foi descartado)
+        self._mudou = threading.Condition(self._trava)
+        self._total = 0
+        self._principal_no_pool = False
+        self._extras = set()
+        self._cookies = []
+        self._versao_cookies = 0
+        self._versao_do_driver = {}
+
+    def _abrir_driver(self):
+        with self._trava:
+            usar_principal = not self._principal_no_pool
+            self._principal_no_pool = True
+        if usar_principal:
+            driver = self.principal.obter()
+            if driver is None:
+                with self._trava:
+                    self._principal_no_pool = False
+            return driver
+
+        print(" -> Abrindo mais um navegador para o pool...")
+        # Com perfil persistente, os extras caem em perfis temporários (o do site está em uso)
+        driver = setup_selenium_driver(run_headless=self.principal.run_headless, perfil=self.principal.perfil)
+        if driver is not None:
+            with self._trava:
+                self._extras.add(driver)
+        return driver
+
+    def emprestar(self):
+        """Retorna um navegador livre (abrindo um novo se couber), ou None se nenhum pôde ser aberto."""
+        while True:
+            with self._mudou:
+                while not self._livres and self._total >= self.tamanho:
+                    self._mudou.wait()
+                if self._livres:
+                    driver = self._livres.pop()
+                    break
+                self._total += 1
+            driver = self._abrir_driver()
+            if driver is not None:
+                break
+            with self._mudou:
+                self._total -= 1
+                # Não adianta tentar abrir de novo a cada capítulo: o pool fica do tamanho atual
+                self.tamanho = max(1, self._total)
+                nenhum = self._total == 0
+                self._mudou.notify_all()
+            if nenhum:
+                return None
+        self._aplicar_cookies(driver)
+        return driver
+
+    def devolver(self, driver):
+        """Devolve o navegador ao pool; se ele travou, é descartado e reaberto no próximo empréstimo."""
+        if driver_vivo(driver):
+            self._guardar_cookies(driver)
+            with self._mudou:
+                self._livres.append(driver)
+                self._mudou.notify()
+            return
+        print("  [!] Um navegador do pool parou de responder. Ele será reaberto.")
+        if driver is self.principal.driver:
+            self.principal.descartar()
+            with self._trava:
+                self._principal_no_pool = False
+        else:
+            with self._trava:
+                self._extras.discard(driver)
+            try:
+                fechar_driver(driver)
+            except Exception:
+                pass
+        with self._mudou:
+            self._total -= 1
+            self._versao_do_driver.pop(id(driver), None)
+            # Abriu uma vaga: quem está esperando pode abrir um navegador novo
+            self._mudou.notify()
+
+    def _guardar_cookies(self, driver):
+        """Junta os cookies do navegador aos do pool (um navegador sem login não apaga o login dos outros)."""
+        try:
+            cookies = driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        except Exception:
+            return
+        cookies = {
+            (c['name'], c.get('domain'), c.get('path')): {campo: c[campo] for campo in _CAMPOS_COOKIE if campo in c}
+            for c in cookies
+        }
+        with self._trava:
+            antes = {(c['name'], c.get('domain'), c.get('path')): c for c in self._cookies}
+            juntos = dict(antes)
+            juntos.update(cookies)
+            if juntos != antes:
+                self._cookies = list(juntos.values())
+                self._versao_cookies += 1
+            if len(cookies) == len(juntos):
+                self._versao_do_driver[id(driver)] = self._versao_cookies
+            else:
+                # Falta algum cookie neste navegador: ele recebe os do pool no próximo empréstimo
+                self._versao_do_driver.pop(id(driver), None)
+
+    def _aplicar_cookies(self, driver):
+        with self._trava:
+            if not self._cookies or self._versao_do_driver.get(id(driver)) == self._versao_cookies:
+                return
+            cookies, versao = list(self._cookies), self._versao_cookies
+        try:
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+            with self._trava:
+                self._versao_do_driver[id(driver)] = versao
+        except Exception as e:
+            print(f"  [!] Não foi possível copiar os cookies para o navegador: {e}")
+
+    def fechar(self):
+        """Fecha os navegadores extras; o principal continua com quem o criou."""
+        with self._trava:
+            extras, self._extras = list(self._extras), set()
+        for driver in extras:
+            try:
+                fechar_driver(driver)
+            except Exception:
+                pass
@@ -0,0 +1,130 @@
+import time
+
+from captura_rede import eventos_de_rede
+from driver_setup import colheita_ativa
+
+# ==============================================================================
+# PRONTIDÃO DA PÁGINA
+# Em vez de uma pausa fixa depois de abrir cada capítulo, espera sinais reais de
+# que a página terminou de montar: a rede ficou ociosa (log de performance), o
+# número de imagens parou de mudar e, quando as imagens não estão bloqueadas,
+# todas terminaram de carregar. Cada espera tem um limite (definido por site) e
+# informa quanto tempo realmente levou.
+# ==============================================================================
+
+INTERVALO_CONSULTA = 0.1
+
+# Por quanto tempo o sinal precisa ficar parado para a página ser dada como pronta
+TEMPO_ESTAVEL = 0.5
+
+# Requisições que nunca terminam (ex: long polling, websockets) não contam
+PENDENTES_TOLERADAS = 2
+
+_SCRIPT_CONTAGEM = """
+    return document.querySelectorAll(arguments[0]).length;
+"""
+
+_SCRIPT_CONTAGEM_COM_SRC = """
+    return Array.from(document.querySelectorAll(arguments[0]))
+        .filter(img => (img.getAttribute('src') || '').trim()).length;
+"""
+
+_SCRIPT_IMAGENS_CARREGADAS = """
+    const imagens = Array.from(document.querySelectorAll(arguments[0]));
+    return imagens.length > 0 && imagens.every(img => img.complete && img.naturalWidth > 0);
+"""
+
+def _esperar(condicao, tempo_maximo):
+    """Consulta `condicao()` até ela ser verdadeira ou o tempo acabar. Retorna True se ficou pronta."""
+    limite = time.monotonic() + tempo_maximo
+    while True:
+        if condicao():
+            return True
+        if time.monotonic() >= limite:
+            return False
+        time.sleep(INTERVALO_CONSULTA)
+
+def _rede_ociosa(driver, filtro_url=None):
+    """
+    Cria a condição de rede ociosa: no máximo PENDENTES_TOLERADAS requisições
+    abertas e nenhum evento novo há TEMPO_ESTAVEL segundos. Usa os eventos
+    acumulados desde a última limpeza do log (captura_rede.limpar_log_rede).
+    Com `filtro_url`, espera pelo menos uma requisição que combine e todas terminarem.
+    """
+    estado = {'eventos': -1, 'desde': time.monotonic()}
+    toleradas = 0 if filtro_url else PENDENTES_TOLERADAS
+
+    def condicao():
+        eventos = eventos_de_rede(driver)
+        agora = time.monotonic()
+        if len(eventos) != estado['eventos']:
+            estado['eventos'], estado['desde'] = len(eventos), agora
+            return False
+        pendentes = set()
+        vistas = 0
+        for evento in eventos:
+            metodo = evento.get('method')
+            params = evento.get('params', {})
+            if metodo == 'Network.requestWillBeSent':
+                if filtro_url is None or filtro_url in params['request']['url']:
+                    pendentes.add(params.get('requestId'))
+                    vistas += 1
+            elif metodo in ('Network.loadingFinished', 'Network.loadingFailed'):
+                pendentes.discard(params.get('requestId'))
+        if filtro_url and not vistas:
+            return False
+        return len(pendentes) <= toleradas and agora - estado['desde'] >= TEMPO_ESTAVEL
+
+    return condicao
+
+def _contagem_estavel(driver, seletor, script=_SCRIPT_CONTAGEM):
+    """Cria a condição: há elementos e a quantidade não muda há TEMPO_ESTAVEL segundos."""
+    estado = {'contagem': -1, 'desde': time.monotonic()}
+
+    def condicao():
+        contagem = driver.execute_script(script, seletor)
+        agora = time.monotonic()
+        if contagem != estado['contagem']:
+            estado['contagem'], estado['desde'] = contagem, agora
+            return False
+        return contagem > 0 and agora - estado['desde'] >= TEMPO_ESTAVEL
+
+    return condicao
+
+def _relatar(pronta, inicio, tempo_maximo):
+    gasto = time.monotonic() - inicio
+    if pronta:
+        print(f"    -> Página pronta em {gasto:.1f}s.")
+    else:
+        print(f"    -> A página não estabilizou em {tempo_maximo:g}s; seguindo com o que carregou.")
+    return gasto
+
+def esperar_rede_ociosa(driver, tempo_maximo, filtro_url=None):
+    """
+    Espera a rede do navegador ficar ociosa. Com `filtro_url`, só contam as
+    requisições cuja URL contém o texto. Retorna os segundos gastos.
+    """
+    inicio = time.monotonic()
+    pronta = _esperar(_rede_ociosa(driver, filtro_url), tempo_maximo)
+    return _relatar(pronta, inicio, tempo_maximo)
+
+def esperar_elementos_estaveis(driver, seletor, tempo_maximo):
+    """Espera a quantidade de elementos de `seletor` parar de mudar. Retorna os segundos gastos."""
+    inicio = time.monotonic()
+    pronta = _esperar(_contagem_estavel(driver, seletor), tempo_maximo)
+    return _relatar(pronta, inicio, tempo_maximo)
+
+def esperar_imagens(driver, seletor, tempo_maximo):
+    """
+    Espera as imagens de `seletor` ficarem prontas para ter as URLs lidas. Sempre
+    espera a quantidade delas (com 'src') estabilizar; se as imagens não estão bloqueadas pelo
+    modo de colheita, espera também todas terminarem de carregar (complete e
+    naturalWidth), que é o que a captura pela rede precisa. O limite vale para as
+    duas esperas juntas. Retorna os segundos gastos.
+    """
+    inicio = time.monotonic()
+    pronta = _esperar(_contagem_estavel(driver, seletor, _SCRIPT_CONTAGEM_COM_SRC), tempo_maximo)
+    if pronta and not colheita_ativa(driver):
+        restante = max(0, tempo_maximo - (time.monotonic() - inicio))
+        pronta = _esperar(lambda: driver.execute_script(_SCRIPT_IMAGENS_CARREGADAS, seletor), restante)
+    return _relatar(pronta, inicio, tempo_maximo)
@@ -0,0 +1,111 @@
+from cache_obras import ler_obra, salvar_obra
+from espelhos import registrar_espelhos
+from sites import sussytoons, mangalivre, sakuramangas, manhastro, loverstoon, mediocretoons, batoto
+
+# ==============================================================================
+# ROTEADOR DE SITES
+# Cada entrada descreve como obter os dados da obra e baixar os capítulos de um
+# site. 'preparar_capitulo' (opcional) só encontra as páginas (no navegador ou na
+# API), para que o download aconteça em paralelo com o próximo capítulo (ver pipeline.py).
+# 'espelhos' (opcional) lista grupos de hosts de imagens com o mesmo conteúdo;
+# só entram hosts conferidos (outros podem vir de MANGA_ESPELHOS).
+# ==============================================================================
+
+SITES = [
+    {
+        'handler': 'sussy_api',
+        'dominios': ('sussytoons.wtf', 'sussytoons.site'),
+        'usa_selenium': False,
+        'obter_dados': sussytoons.obter_dados_obra_sussy_api,
+        'baixar_capitulo': sussytoons.baixar_capitulo_sussy_api,
+        'preparar_capitulo': sussytoons.preparar_capitulo_sussy_api,
+    },
+    {
+        'handler': 'mangalivre_selenium',
+        'dominios': ('mangalivre.tv',),
+        'usa_selenium': True,
+        'headless': False,
+        'obter_dados': mangalivre.obter_dados_obra_selenium,
+        'baixar_capitulo': mangalivre.baixar_capitulo_selenium,
+        'preparar_capitulo': mangalivre.preparar_capitulo_selenium,
+    },
+    {
+        'handler': 'sakura_selenium',
+        'dominios': ('sakuramangas.org',),
+        'usa_selenium': True,
+        'headless': True,
+        'obter_dados': sakuramangas.obter_dados_obra_sakura,
+        'baixar_capitulo': sakuramangas.baixar_capitulo_sakura,
+        'preparar_capitulo': sakuramangas.preparar_capitulo_sakura,
+    },
+    {
+        'handler': 'manhastro_selenium',
+        'dominios': ('manhastro.net',),
+        'usa_selenium': True,
+        'headless': False,
+        'obter_dados': manhastro.obter_dados_obra_manhastro,
+        'baixar_capitulo': manhastro.baixar_capitulo_manhastro,
+        'preparar_capitulo': manhastro.preparar_capitulo_manhastro,
+    },
+    {
+        'handler': 'loverstoon_selenium',
+        'dominios': ('loverstoon.com',),
+        'usa_selenium': True,
+        'headless': False,
+        'obter_dados': loverstoon.obter_dados_obra_loverstoon,
+        'baixar_capitulo': loverstoon.baixar_capitulo_loverstoon,
+        'preparar_capitulo': loverstoon.preparar_capitulo_loverstoon,
+    },
+    {
+        'handler': 'mediocre_api',
+        'dominios': ('mediocretoons.com',),
+        'usa_selenium': False,
+        'obter_dados': mediocretoons.obter_dados_obra_mediocre,
+        'baixar_capitulo': mediocretoons.baixar_capitulo_mediocre,
+        'preparar_capitulo': mediocretoons.preparar_capitulo_mediocre,
+    },
+    {
+        'handler': 'batoto_selenium',
+        'dominios': ('bato.to',),
+        'usa_selenium': True,
+        'headless': True,
+        'obter_dados': batoto.obter_dados_obra_batoto,
+        'baixar_capitulo': batoto.baixar_capitulo_batoto,
+        'preparar_capitulo': batoto.preparar_capitulo_batoto,
+    },
+]
+
+for _site in SITES:
+    for _grupo in _site.get('espelhos', ()):
+        registrar_espelhos(_grupo)
+
+def identificar_site(obra_url):
+    """Retorna a entrada de SITES correspondente à URL, ou None se o site não for suportado."""
+    for site in SITES:
+        if any(dominio in obra_url for dominio in site['dominios']):
+            return site
+    return None
+
+def obter_dados_da_obra(site, obra_url, recurso, usar_cache=True):
+    """
+    Retorna (titulo, lista_de_capitulos) da obra. Nos sites com navegador `recurso`
+    é um DriverPreguicoso: com os dados no cache o navegador nem é iniciado, e com
+    `usar_cache=False` a lista é sempre buscada no site (e o cache é atualizado).
+    """
+    if not site['usa_selenium']:
+        # Sites de API usam apenas o scraper para obter a lista de capítulos
+        return site['obter_dados'](obra_url, recurso)
+
+    dados_em_cache = ler_obra(obra_url) if usar_cache else None
+    if dados_em_cache:
+        obra_nome, lista_de_capitulos, idade = dados_em_cache
+        print(f"Obra encontrada no cache (há {int(idade // 60)} min): '{obra_nome}' com {len(lista_de_capitulos)} capítulos.")
+        print(" -> Para buscar a lista de novo no site, use MANGA_CACHE_OBRAS_TTL=0.")
+        return obra_nome, lista_de_capitulos
+
+    driver = recurso.obter()
+    if driver is None:
+        return None, []
+    obra_nome, lista_de_capitulos = site['obter_dados'](obra_url, driver)
+    salvar_obra(obra_url, obra_nome, lista_de_capitulos)
+    return obra_nome, lista_de_capitulos
@@ -0,0 +1,79 @@
+import threading
+import weakref
+
+import requests
+
+from config import MAX_DOWNLOADS_SIMULTANEOS
+from downloader import ajustar_pool_conexoes
+
+# Uma ponte por driver. A ponte só guarda uma referência fraca ao driver, para a
+# entrada sumir quando ele é descartado; fechar_driver também a remove na hora.
+_pontes = weakref.WeakKeyDictionary()
+_trava_pontes = threading.Lock()
+
+class SessaoDoDriver:
+    """
+    Ponte entre um navegador Selenium e uma requests.Session de longa duração.
+
+    A sessão mantém um pool de conexões aquecido por host de imagens e recebe os
+    cookies do navegador apenas quando eles mudam (ou quando o servidor responde
+    401/403), em vez de criar uma sessão nova e copiar tudo a cada imagem.
+    """
+
+    def __init__(self, driver):
+        self._driver = weakref.ref(driver)
+        self.session = requests.Session()
+        ajustar_pool_conexoes(self.session, MAX_DOWNLOADS_SIMULTANEOS)
+        self._assinatura_cookies = None
+        self._trava = threading.Lock()
+        try:
+            # O cf_clearance do Cloudflare só vale para o mesmo User-Agent do navegador
+            user_agent = driver.execute_script("return navigator.userAgent")
+            if user_agent:
+                self.session.headers['User-Agent'] = user_agent
+        except Exception:
+            pass
+
+    @property
+    def driver(self):
+        return self._driver()
+
+    def sincronizar(self, forcar=False):
+        """
+        Lê os cookies do navegador (uma chamada ao WebDriver) e só atualiza a sessão
+        se algo mudou. Retorna True se os cookies da sessão foram alterados.
+        """
+        with self._trava:
+            driver = self.driver
+            if driver is None:
+                return False
+            cookies = driver.get_cookies()
+            assinatura = frozenset((c['name'], c['value'], c.get('domain', '')) for c in cookies)
+            if assinatura == self._assinatura_cookies and not forcar:
+                return False
+            self.session.cookies.clear()
+            for cookie in cookies:
+                self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''))
+            self._assinatura_cookies = assinatura
+            return True
+
+    def renovar(self):
+        """Chamado pelo motor de download depois de um 401/403."""
+        print("    -> Acesso negado pelo servidor de imagens. Sincronizando cookies do navegador...")
+        self.sincronizar(forcar=True)
+
+def obter_sessao_do_driver(driver):
+    """Retorna a ponte de sessão deste driver, criando-a na primeira chamada."""
+    with _trava_pontes:
+        ponte = _pontes.get(driver)
+        if ponte is None:
+            ponte = SessaoDoDriver(driver)
+            _pontes[driver] = ponte
+    return ponte
+
+def descartar_sessao(driver):
+    """Remove a ponte do driver (chamado ao fechar o navegador) e fecha o pool de conexões dela."""
+    with _trava_pontes:
+        ponte = _pontes.pop(driver, None)
+    if ponte is not None:
+        ponte.session.close()
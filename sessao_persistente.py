@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+
+import cloudscraper
+
+from config import PASTA_CACHE, SESSAO_SCRAPER_TTL
+from controle_taxa import desafio_do_cloudflare
+
+# ==============================================================================
+# SESSÃO PERSISTENTE DO CLOUDSCRAPER
+# Um scraper novo a cada execução resolve o desafio do Cloudflare de novo logo na
+# primeira requisição. Guardamos os cookies (incluindo o cf_clearance) e o
+# User-Agent ao sair e os restauramos ao iniciar. O cf_clearance só vale para o
+# mesmo User-Agent, por isso o scraper é recriado com o User-Agent salvo. Uma
+# resposta de desafio (403/503 do Cloudflare) invalida a sessão salva.
+# ==============================================================================
+
+ARQUIVO_SESSAO = os.path.join(PASTA_CACHE, 'sessao_scraper.json')
+
+_trava = threading.Lock()
+
+def _ler_sessao():
+    try:
+        with open(ARQUIVO_SESSAO, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - dados.get('salvo_em', 0) > SESSAO_SCRAPER_TTL:
+        return None
+    return dados
+
+def invalidar_sessao():
+    """Apaga a sessão salva (ex: o Cloudflare voltou a pedir o desafio)."""
+    with _trava:
+        try:
+            os.remove(ARQUIVO_SESSAO)
+        except OSError:
+            pass
+
+def salvar_sessao(scraper, user_agent):
+    """
+    Grava os cookies ainda válidos do scraper e o User-Agent com que foram obtidos.
+    Cookies de domínios que este scraper não tem são mantidos do arquivo anterior,
+    para que vários scrapers (ex: um por site no monitor) não apaguem uns aos outros.
+    """
+    agora = time.time()
+    cookies = {}
+    with _trava:
+        anteriores = _ler_sessao()
+        if anteriores and anteriores.get('user_agent') == user_agent:
+            for cookie in anteriores['cookies']:
+                cookies[(cookie['name'], cookie['domain'], cookie['path'])] = cookie
+        dominios = {cookie.domain for cookie in scraper.cookies}
+        cookies = {chave: c for chave, c in cookies.items() if c['domain'] not in dominios}
+        for cookie in scraper.cookies:
+            if cookie.expires is not None and cookie.expires <= agora:
+                continue
+            cookies[(cookie.name, cookie.domain, cookie.path)] = {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires,
+                'secure': cookie.secure,
+            }
+        try:
+            os.makedirs(PASTA_CACHE, exist_ok=True)
+            descritor, temporario = tempfile.mkstemp(dir=PASTA_CACHE, suffix='.part')
+            with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+                json.dump({'user_agent': user_agent, 'salvo_em': agora, 'cookies': list(cookies.values())}, f)
+            os.replace(temporario, ARQUIVO_SESSAO)
+        except OSError as e:
+            print(f"  [!] Não foi possível salvar a sessão do scraper: {e}")
+
+def criar_scraper():
+    """
+    Cria o cloudscraper restaurando a sessão salva (se ainda válida). A sessão é
+    gravada de volta automaticamente quando o programa termina.
+    """
+    dados = _ler_sessao()
+    agora = time.time()
+    if dados and dados.get('user_agent'):
+        scraper = cloudscraper.create_scraper(browser={'custom': dados['user_agent']})
+        restaurados = 0
+        for cookie in dados['cookies']:
+            if cookie.get('expires') is not None and cookie['expires'] <= agora:
+                continue
+            scraper.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'],
+                                expires=cookie.get('expires'), secure=cookie.get('secure', False))
+            restaurados += 1
+        if restaurados:
+            print(f" -> Sessão do scraper restaurada ({restaurados} cookies).")
+    else:
+        scraper = cloudscraper.create_scraper()
+
+    # Os sites podem trocar o User-Agent da sessão (ex: Mediocretoons); o que vale
+    # para os cookies salvos é o que o scraper usou ao resolver o desafio
+    user_agent = scraper.headers['User-Agent']
+    estado = {'invalida': False}
+
+    def verificar_resposta(response, *args, **kwargs):
+        if desafio_do_cloudflare(response.status_code, response.headers):
+            if not estado['invalida']:
+                estado['invalida'] = True
+                invalidar_sessao()
+        elif estado['invalida'] and response.ok:
+            # O scraper resolveu o desafio: a sessão nova pode ser salva ao sair
+            estado['invalida'] = False
+
+    def salvar_ao_sair():
+        if not estado['invalida']:
+            salvar_sessao(scraper, user_agent)
+
+    scraper.hooks['response'].append(verificar_resposta)
+    atexit.register(salvar_ao_sair)
+    return scraper
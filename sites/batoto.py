@@ -1,6 +1,5 @@
 import os
 import re
-import time
 from urllib.parse import urljoin
 
 # Imports do Selenium, que já estão no seu projeto
@@ -8,8 +7,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-# Importa a função de download que usa a sessão do Selenium, que é mais robusta
-from sites.manhastro import download_image_with_session
+from sessao_driver import obter_sessao_do_driver
+from downloader import preparo_do_capitulo, baixar_capitulo_preparado
+from captura_rede import preparar_captura, salvar_imagens_capturadas
+from driver_setup import modo_colheita, colheita_ativa
+from prontidao import esperar_imagens
+
+# Limite (em segundos) para a página do capítulo terminar de montar
+ESPERA_MAXIMA_PAGINA = 4
 
 
 def obter_dados_obra_batoto(obra_url, driver):
@@ -63,10 +68,8 @@ def obter_dados_obra_batoto(obra_url, driver):
         return None, []
 
 
-def baixar_capitulo_batoto(chapter_info, driver, base_path):
-    """
-    Baixa as imagens de um capítulo do Batoto usando Selenium.
-    """
+def preparar_capitulo_batoto(chapter_info, driver, base_path):
+    """Abre o capítulo no navegador e monta a lista de páginas, sem baixá-las."""
     chapter_url = chapter_info["cap_url"]
     chapter_number = chapter_info["cap_numero"]
 
@@ -85,49 +88,57 @@ def baixar_capitulo_batoto(chapter_info, driver, base_path):
 
     try:
         print(f"  Acessando página do capítulo {chapter_number}...")
-        driver.get(chapter_url)
-        wait = WebDriverWait(driver, 20)
-
-        # Espera o contêiner das imagens e pelo menos uma imagem carregar
-        wait.until(
-            EC.visibility_of_element_located((By.CSS_SELECTOR, "div#viewer img.page-img"))
-        )
-        # Uma pequena pausa extra para garantir que os scripts terminem de rodar
-        time.sleep(2)
-
-        img_elements = driver.find_elements(By.CSS_SELECTOR, "div#viewer img.page-img")
+        preparar_captura(driver)
+        # Só as URLs das imagens são necessárias aqui: bloqueia o resto para a página carregar mais rápido
+        with modo_colheita(driver):
+            driver.get(chapter_url)
+            wait = WebDriverWait(driver, 20)
+
+            # Espera o contêiner das imagens e pelo menos uma imagem carregar
+            # (com as imagens bloqueadas elas não ficam "visíveis", basta existirem no DOM)
+            condicao = EC.presence_of_element_located if colheita_ativa(driver) else EC.visibility_of_element_located
+            wait.until(
+                condicao((By.CSS_SELECTOR, "div#viewer img.page-img"))
+            )
+            # Espera os scripts terminarem de montar todas as imagens
+            esperar_imagens(driver, "div#viewer img.page-img", ESPERA_MAXIMA_PAGINA)
+
+            img_elements = driver.find_elements(By.CSS_SELECTOR, "div#viewer img.page-img")
         if not img_elements:
             print(f"  Nenhuma imagem encontrada para o capítulo {chapter_number}.")
-            return 0, 1
+            return None
 
         total_images = len(img_elements)
-        images_downloaded = 0
         print(f"  Encontradas {total_images} imagens. Iniciando download...")
 
+        # A ponte mantém a mesma sessão (e conexões) entre capítulos e só
+        # copia os cookies do navegador quando eles mudam
+        ponte = obter_sessao_do_driver(driver)
+        ponte.sincronizar()
+        headers = {"Referer": chapter_url}
+        paginas_para_baixar = []
+
         for i, img_element in enumerate(img_elements):
             img_url = img_element.get_attribute("src")
             if not img_url:
                 continue
-            try:
-                _, extension = os.path.splitext(img_url.split("?")[0])
-                if not extension:
-                    extension = ".jpg"
-                filename = f"{str(i + 1).zfill(3)}{extension}"
-                filepath = os.path.join(chapter_path, filename)
-
-                # Reutilizando a função de download robusta que já existe no seu projeto
-                success = download_image_with_session(driver, img_url, filepath)
-                if success:
-                    images_downloaded += 1
-                
-                time.sleep(0.2)
-
-            except Exception as e:
-                print(f"    -> Erro no download da imagem {i + 1}: {e}")
-
-        print(f"  Capítulo {chapter_number}: {images_downloaded}/{total_images} imagens baixadas.")
-        return images_downloaded, total_images - images_downloaded
+            _, extension = os.path.splitext(img_url.split("?")[0])
+            if not extension:
+                extension = ".jpg"
+            filename = f"{str(i + 1).zfill(3)}{extension}"
+            filepath = os.path.join(chapter_path, filename)
+            paginas_para_baixar.append((img_url, headers, None, filepath))
+
+        # Imagens que o navegador já carregou não precisam ser baixadas de novo
+        capturadas, paginas_para_baixar = salvar_imagens_capturadas(driver, paginas_para_baixar)
+        return preparo_do_capitulo(chapter_number, paginas_para_baixar, total_images, capturadas, sessao=ponte.session, ao_negar_acesso=ponte.renovar)
 
     except Exception as e:
         print(f"  Ocorreu um erro ao processar o capítulo {chapter_number} com Selenium: {e}")
-        return 0, 1
\ No newline at end of file
+        return None
+
+def baixar_capitulo_batoto(chapter_info, driver, base_path):
+    """
+    Baixa as imagens de um capítulo do Batoto usando Selenium.
+    """
+    return baixar_capitulo_preparado(preparar_capitulo_batoto(chapter_info, driver, base_path))
@@ -1,6 +1,9 @@
 import os
 import re
-import time
+
+from downloader import preparo_do_capitulo, baixar_capitulo_preparado
+from cache_http import obter_json, obter_json_com_estado
+from cache_obras import ler_obra, salvar_obra
 
 # Headers necessários para a comunicação com a API da Mediocretoons
 MEDIOCRE_HEADERS = {
@@ -30,9 +33,15 @@ def obter_dados_obra_mediocre(obra_url, scraper_session):
         # Adiciona os headers específicos para a Mediocretoons na sessão
         scraper_session.headers.update(MEDIOCRE_HEADERS)
         
-        response = scraper_session.get(api_url, timeout=20)
-        response.raise_for_status()
-        data = response.json()
+        # Passa pelo cache HTTP: dentro do TTL vem do disco; depois, um 304 evita baixar a obra de novo
+        data, inalterado = obter_json_com_estado(scraper_session, api_url, timeout=20)
+        if inalterado:
+            # Mesma resposta da última vez: a lista já montada no cache das obras continua valendo
+            dados_em_cache = ler_obra(obra_url, ttl=float('inf'))
+            if dados_em_cache:
+                obra_nome, lista_de_capitulos, _ = dados_em_cache
+                print(f"Obra sem mudanças na API: '{obra_nome}' com {len(lista_de_capitulos)} capítulos.")
+                return obra_nome, lista_de_capitulos
 
         obra_nome = data.get('nome', f"obra_{obra_id}")
         capitulos_api = data.get('capitulos', [])
@@ -51,6 +60,7 @@ def obter_dados_obra_mediocre(obra_url, scraper_session):
             })
 
         lista_de_capitulos.reverse()
+        salvar_obra(obra_url, obra_nome, lista_de_capitulos)
         print(f"Obra encontrada: '{obra_nome}' com {len(lista_de_capitulos)} capítulos.")
         return obra_nome, lista_de_capitulos
         
@@ -58,8 +68,11 @@ def obter_dados_obra_mediocre(obra_url, scraper_session):
         print(f"Erro ao buscar informações da obra via API: {e}")
         return None, []
 
-def baixar_capitulo_mediocre(chapter_info, scraper_session, base_path):
-    """Baixa um capítulo da Mediocretoons via API."""
+def preparar_capitulo_mediocre(chapter_info, scraper_session, base_path):
+    """
+    Busca na API as páginas de um capítulo da Mediocretoons, sem baixá-las.
+    Retorna o preparo do capítulo para o motor de download, ou None em caso de erro.
+    """
     chapter_number = chapter_info['cap_numero']
     cap_id = chapter_info['cap_id']
     obra_id = chapter_info['obra_id']
@@ -83,51 +96,42 @@ def baixar_capitulo_mediocre(chapter_info, scraper_session, base_path):
         # Garante que os headers estão na sessão
         scraper_session.headers.update(MEDIOCRE_HEADERS)
 
-        response = scraper_session.get(chapter_api_url, timeout=20)
-        response.raise_for_status()
-        data = response.json()
+        data = obter_json(scraper_session, chapter_api_url, timeout=20)
 
         paginas = data.get('paginas', [])
 
         if paginas:
-            print(f"  Encontradas {len(paginas)} imagens via API. Iniciando download...")
-            images_downloaded = 0
+            print(f"  Encontradas {len(paginas)} imagens via API.")
             total_images = len(paginas)
+            paginas_para_baixar = []
             
             for i, pagina in enumerate(paginas):
-                try:
-                    img_src = pagina.get('src')
-                    if not img_src:
-                        print(f"\\n    -> SRC da imagem {i+1} está vazio. Pulando.")
-                        continue
-
-                    # Monta a URL da imagem
-                    numero_cap = s_chapter_number.replace('.0', '')
-                    img_url = f"https://cdn.mediocretoons.com/obras/{obra_id}/capitulos/{numero_cap}/{img_src}"
-                    
-                    _, extension = os.path.splitext(img_src.split('?')[0])
-                    if not extension: extension = '.webp' # Padrão do site
-                    filename = f"{str(i + 1).zfill(3)}{extension}"
-                    filepath = os.path.join(chapter_path, filename)
-                    
-                    img_response = scraper_session.get(img_url, stream=True, timeout=30)
-                    img_response.raise_for_status()
-                    with open(filepath, 'wb') as f:
-                        for chunk in img_response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    images_downloaded += 1
-                    time.sleep(0.1)
+                img_src = pagina.get('src')
+                if not img_src:
+                    print(f"\\n    -> SRC da imagem {i+1} está vazio. Pulando.")
+                    continue
 
-                except Exception as e:
-                    print(f"\\n    -> Erro no loop de download para a imagem {i+1}: {e}")
+                # Monta a URL da imagem
+                numero_cap = s_chapter_number.replace('.0', '')
+                img_url = f"https://cdn.mediocretoons.com/obras/{obra_id}/capitulos/{numero_cap}/{img_src}"
+                
+                _, extension = os.path.splitext(img_src.split('?')[0])
+                if not extension: extension = '.webp' # Padrão do site
+                filename = f"{str(i + 1).zfill(3)}{extension}"
+                filepath = os.path.join(chapter_path, filename)
+                paginas_para_baixar.append((img_url, None, None, filepath))
             
-            print(f"\\n  Capítulo {chapter_number}: {images_downloaded}/{total_images} imagens baixadas com sucesso.")
-            return images_downloaded, total_images - images_downloaded
+            # O download fica com o motor, reaproveitando a sessão do scraper
+            return preparo_do_capitulo(chapter_number, paginas_para_baixar, total_images, sessao=scraper_session)
         
         else:
             print(f"  Nenhuma página encontrada para o capítulo {chapter_number} na resposta da API.")
-            return 0, 1
+            return None
 
     except Exception as e:
         print(f"  Ocorreu um erro geral ao processar o capítulo {chapter_number}: {e}")
-        return 0, 1
+        return None
+
+def baixar_capitulo_mediocre(chapter_info, scraper_session, base_path):
+    """Baixa um capítulo da Mediocretoons via API."""
+    return baixar_capitulo_preparado(preparar_capitulo_mediocre(chapter_info, scraper_session, base_path))
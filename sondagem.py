@@ -0,0 +1,152 @@
+import os
+import json
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PASTA_CACHE, SONDAGEM_CONCORRENCIA
+from controle_taxa import controle_do_host
+
+# ==============================================================================
+# SONDAGEM DO NÚMERO DE PÁGINAS
+# Nos downloads por adivinhação de URL, testar índice por índice até errar três
+# vezes seguidas desperdiça uma requisição lenta por erro (vezes cada formato).
+# Aqui o fim do capítulo é encontrado com uma busca exponencial (1, 2, 4, 8...)
+# seguida de busca binária, testando vários índices de uma vez em cada rodada.
+# Quem chama fornece `existem(indices)`, que testa um lote de índices (ex: HEAD em
+# paralelo ou fetch no navegador) e devolve o conjunto dos que existem.
+# ==============================================================================
+
+ARQUIVO_FORMATOS = os.path.join(PASTA_CACHE, 'formatos_paginas.json')
+
+# Páginas faltando no meio do capítulo (ex: uma imagem removida) que não encerram a busca
+TOLERANCIA_LACUNAS = 2
+
+_trava_formatos = threading.Lock()
+
+def contar_paginas(existem, primeira=1, ultima_conhecida=None, largura=SONDAGEM_CONCORRENCIA):
+    """
+    Encontra o índice da última página. `ultima_conhecida` é uma página que já se
+    sabe existir (ex: vista no log de rede), de onde a busca parte. Retorna
+    (ultima, consultas, lacunas); ultima é primeira - 1 se nenhuma página existe
+    e lacunas são os índices antes dela que a busca testou e não existem. Os
+    índices não testados não são conferidos um a um: quem chama os baixa direto
+    e uma página que faltar só falha no download.
+    """
+    ultimo = primeira - 1 if ultima_conhecida is None else ultima_conhecida
+    consultas = 0
+    ausentes = set()
+
+    def testar(pontos):
+        nonlocal consultas
+        achados = existem(pontos)
+        consultas += len(pontos)
+        ausentes.update(p for p in pontos if p not in achados)
+        ausentes.difference_update(achados)
+        return achados
+
+    while True:
+        # Busca exponencial: ultimo+1, +2, +4... até achar um índice que não existe
+        fim = None
+        base = ultimo
+        expoente = 0
+        while fim is None:
+            pontos = [base + 2 ** (expoente + k) for k in range(largura)]
+            expoente += largura
+            achados = testar(pontos)
+            ultimo = max(achados | {ultimo})
+            faltando = [p for p in pontos if p > ultimo and p not in achados]
+            if faltando:
+                fim = min(faltando)
+
+        # Busca binária (com vários pontos por rodada) entre a última que existe e a primeira que falta
+        while fim - ultimo > 1:
+            intervalo = fim - ultimo
+            pontos = sorted({ultimo + max(1, intervalo * (k + 1) // (largura + 1)) for k in range(largura)} - {fim})
+            achados = testar(pontos)
+            ultimo = max(achados | {ultimo})
+            faltando = [p for p in pontos if p > ultimo and p not in achados]
+            if faltando:
+                fim = min(faltando)
+
+        # Confirma o fim: uma lacuna curta no meio do capítulo não é o fim
+        pontos = [fim + k for k in range(1, TOLERANCIA_LACUNAS + 1)]
+        achados = testar(pontos)
+        if not achados:
+            return ultimo, consultas, sorted(i for i in ausentes if primeira <= i < ultimo)
+        ultimo = max(achados)
+
+def existem_por_http(sessao, montar_url, max_workers=SONDAGEM_CONCORRENCIA):
+    """
+    Cria a função `existem` para uma requests.Session: testa os índices em paralelo
+    com HEAD (ou GET de 1 byte, se o servidor não aceitar HEAD).
+    """
+    def existe(indice):
+        url = montar_url(indice)
+        try:
+            with controle_do_host(url).usar() as uso:
+                resposta = sessao.head(url, timeout=5, allow_redirects=True)
+                if resposta.status_code in (403, 405):
+                    resposta = sessao.get(url, headers={'Range': 'bytes=0-0'}, timeout=5, stream=True)
+                    resposta.close()
+                uso['status'], uso['headers'] = resposta.status_code, resposta.headers
+        except Exception:
+            return False
+        tipo = resposta.headers.get('Content-Type', 'image/')
+        return resposta.status_code in (200, 206) and tipo.startswith('image/')
+
+    def existem(indices):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return {indice for indice, ok in zip(indices, executor.map(existe, indices)) if ok}
+
+    return existem
+
+_SCRIPT_EXISTEM = """
+    const urls = arguments[0];
+    const callback = arguments[arguments.length - 1];
+    Promise.all(urls.map(url => fetch(url, {method: 'HEAD'})
+        .then(r => r.ok && (r.headers.get('content-type') || 'image/').startsWith('image/'))
+        .catch(() => false)))
+        .then(callback);
+"""
+
+def existem_no_navegador(driver, montar_url):
+    """
+    Cria a função `existem` que testa o lote inteiro com um único script no
+    navegador (HEAD via fetch, em paralelo), com os cookies e o contexto da página.
+    """
+    def existem(indices):
+        driver.set_script_timeout(30)
+        resultado = driver.execute_async_script(_SCRIPT_EXISTEM, [montar_url(i) for i in indices]) or []
+        return {indice for indice, ok in zip(indices, resultado) if ok}
+
+    return existem
+
+def formato_da_obra(chave):
+    """Retorna (extensao, zeros) que funcionou da última vez para a obra, ou None."""
+    try:
+        with open(ARQUIVO_FORMATOS, 'r', encoding='utf-8') as f:
+            formato = json.load(f).get(chave)
+    except (OSError, ValueError):
+        return None
+    return tuple(formato) if formato else None
+
+def guardar_formato(chave, extensao, zeros):
+    """Guarda a extensão e o preenchimento com zeros das páginas da obra para os próximos capítulos."""
+    with _trava_formatos:
+        try:
+            with open(ARQUIVO_FORMATOS, 'r', encoding='utf-8') as f:
+                formatos = json.load(f)
+        except (OSError, ValueError):
+            formatos = {}
+        if formatos.get(chave) == [extensao, zeros]:
+            return
+        formatos[chave] = [extensao, zeros]
+        try:
+            os.makedirs(PASTA_CACHE, exist_ok=True)
+            descritor, temporario = tempfile.mkstemp(dir=PASTA_CACHE, suffix='.part')
+            with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+                json.dump(formatos, f)
+            os.replace(temporario, ARQUIVO_FORMATOS)
+        except OSError as e:
+            print(f"  [!] Não foi possível salvar o formato das páginas: {e}")